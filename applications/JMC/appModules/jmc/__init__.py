@@ -0,0 +1,363 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/jmc
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2020 Nick Stockton <nstockton@gmail.com>
+
+"""App module for JMC
+"""
+
+
+# Built-in Python Modules
+import ctypes
+import os.path
+from timeit import default_timer
+
+# Built-in NVDA Modules
+import addonHandler
+import api
+import appModuleHandler
+import config
+import controlTypes
+import globalCommands
+from logHandler import log
+from NVDAObjects.IAccessible import getNVDAObjectFromEvent, ContentGenericClient, IAccessible
+from NVDAObjects.window import Window
+import oleacc
+import speech
+import textInfos
+import ui
+import windowUtils
+import winUser
+
+# Local Modules
+from .earcons import player as earconPlayer
+from .output import Output
+from .settings import AddonConfig, makeSpec, SettingsSwap
+
+# Initialize translations
+addonHandler.initTranslation()
+
+# Script category for JMC gestures.
+# Translators: The name of the JMC gestures category.
+SCRCAT_JMC = _("JMC")
+
+
+try:
+	REASON_CARET = controlTypes.REASON_CARET
+except AttributeError:
+	# NVDA >= 2021.1.0.
+	REASON_CARET = controlTypes.OutputReason.CARET
+
+
+# NVDA settings which are swapped for the JMC ones while JMC has focus.
+# Each is a section, a key, and the spec used to validate it in the JMC configuration file.
+SETTINGS = (
+	("presentation", "reportDynamicContentChanges", "boolean(default=True)"),
+	("reviewCursor", "followCaret", "boolean(default=False)"),
+	("keyboard", "speechInterruptForCharacters", "boolean(default=True)"),
+	("keyboard", "speechInterruptForEnter", "boolean(default=True)"),
+)
+
+# Settings of the add-on itself, with the spec used to validate each in the JMC configuration file.
+OPTIONS = (
+	("output", "foldDuplicates", "boolean(default=True)"),
+	("output", "maxLineAge", "float(default=5.0, min=1.0)"),
+	("output", "scrollbackLines", "integer(default=1000, min=1)"),
+	("output", "copyLines", "integer(default=20, min=1)"),
+	# A block of at least blockLines lines seen in an earlier update is spoken in full, as its first line followed by a short cue, or as just the cue.
+	("output", "repeatedBlocks", 'option("speak", "firstLine", "cue", default="firstLine")'),
+	("output", "blockLines", "integer(default=3, min=2)"),
+	("output", "blockCacheSize", "integer(default=200, min=1)"),
+	# Each gag is a name and a pattern, and each substitution is a name, a pattern, and a replacement.
+	("gags", "__many__", "string"),
+	("substitutions", "__many__", "string_list(min=2, max=2)"),
+	# Each earcon is a name, a pattern, a tone such as 880:40 or a wave file, and optionally gag to remove matched lines from speech.
+	("earcons", "__many__", "string_list(min=2, max=3)"),
+	# The prompt pattern names each field with a group, and a field's threshold is the change needed to report it.
+	("prompt", "pattern", 'string(default="")'),
+	# Prompt changes are spoken even while NVDA doesn't report dynamic content changes, unless alwaysSpeak is off.
+	("prompt", "alwaysSpeak", "boolean(default=True)"),
+	("promptThresholds", "__many__", "float(min=0.0)"),
+)
+
+# Define default values in case the configuration file doesn't exist.
+CONFIG_SPEC = "\n".join(makeSpec(SETTINGS + OPTIONS))
+
+# The window classes of the JMC output, in order of preference.
+OUTPUT_CLASS_NAMES = ("AfxFrameOrView42u", "AfxFrameOrView42")
+
+
+def findDescendantWindow(parent, classNames, visible=None, controlID=None):
+	"""Finds a descendant window of parent whose class is one of classNames, in a single pass over the window tree.
+	If several windows match, the one whose class comes first in classNames is returned.
+	Raises LookupError if no window matches.
+	"""
+	# The first matching window found for each class name.
+	found = {}
+	@windowUtils.WNDENUMPROC
+	def callback(window, data):
+		if (
+			(visible is None or winUser.isWindowVisible(window) == visible)
+			and (not controlID or winUser.getControlID(window) == controlID)
+		):
+			className = winUser.getClassName(window)
+			if className in classNames and className not in found:
+				found[className] = window
+				# Stop enumerating once the preferred class is found.
+				return className != classNames[0]
+		return True
+	ctypes.windll.user32.EnumChildWindows(parent, callback, 0)
+	for className in classNames:
+		if className in found:
+			return found[className]
+	raise LookupError("No matching descendant window found")
+
+
+class Input(Window):
+	def event_gainFocus(self):
+		super(Input, self).event_gainFocus()
+		output = self.appModule.getOutput(api.getForegroundObject().windowHandle)
+		if output is not None:
+			output.resume()
+			api.setNavigatorObject(output)
+			output.TextInfo.stripOuterWhitespace = True
+			self._output = output
+		else:
+			self._output = None
+
+	def event_typedCharacter(self, ch):
+		super(Input, self).event_typedCharacter(ch)
+		if self._output:
+			# Typing may have cancelled speech, so new output shouldn't wait for an utterance which may never finish.
+			self._output.finishUtterance()
+
+	def event_loseFocus(self):
+		if self._output:
+			# Keep the output monitored, so it doesn't need a new baseline when the input gets focus again.
+			self._output.pause()
+
+
+class AppModule(appModuleHandler.AppModule):
+	def __init__(self, *args, **kwargs):
+		super(AppModule, self).__init__(*args, **kwargs)
+		path = os.path.join(addonHandler.getCodeAddon().path, "config.ini")
+		self.jmcConfig = AddonConfig(path, CONFIG_SPEC, "JMC")
+		self.settingsSwap = SettingsSwap((section, key) for section, key, spec in SETTINGS)
+		# The output window handle and object, keyed by the handle of the foreground window containing them.
+		self.outputCache = {}
+		# The number of output lookups answered from the cache, and the number which enumerated the windows.
+		self.outputCacheHits = 0
+		self.outputCacheMisses = 0
+		# The output whose review cursor should be moved to the bottom before it is next used, if any.
+		self.pendingReviewBottom = None
+
+	def terminate(self):
+		self.jmcConfig.flush()
+		for hwnd, output in self.outputCache.values():
+			output.stopMonitoring()
+		self.outputCache.clear()
+		earconPlayer.stop()
+		super(AppModule, self).terminate()
+
+	def chooseNVDAObjectOverlayClasses(self, obj, clsList):
+		if isinstance(obj, IAccessible) and obj.windowClassName in OUTPUT_CLASS_NAMES and obj.windowControlID == 59648 and obj.IAccessibleRole == oleacc.ROLE_SYSTEM_CLIENT:
+			try:
+				clsList.remove(ContentGenericClient)
+			except ValueError:
+				pass
+			clsList.insert(0, Output)
+		elif  isinstance(obj, IAccessible) and obj.windowClassName == "Edit" and obj.windowControlID == 1000 and obj.IAccessibleRole == oleacc.ROLE_SYSTEM_TEXT:
+			clsList.insert(0, Input)
+
+	def getOutput(self, foregroundHandle):
+		"""Returns the output in the foreground window with the given handle, or None if it can't be found.
+		The output is cached until its window or the foreground window is destroyed, so refocusing the input doesn't enumerate the windows again.
+		"""
+		try:
+			hwnd, output = self.outputCache[foregroundHandle]
+		except KeyError:
+			pass
+		else:
+			if winUser.isWindow(hwnd):
+				self.outputCacheHits += 1
+				return output
+			output.stopMonitoring()
+			del self.outputCache[foregroundHandle]
+		self.outputCacheMisses += 1
+		try:
+			hwnd = findDescendantWindow(foregroundHandle, OUTPUT_CLASS_NAMES, visible=True, controlID=59648)
+		except LookupError:
+			return None
+		output = getNVDAObjectFromEvent(hwnd=hwnd, objectID=winUser.OBJID_CLIENT, childID=0)
+		if not isinstance(output, Output):
+			return None
+		if self.jmcConfig.load():
+			output.applyConfig(self.jmcConfig)
+		self.outputCache[foregroundHandle] = (hwnd, output)
+		log.debug("JMC output cached after %d cache hits and %d misses", self.outputCacheHits, self.outputCacheMisses)
+		return output
+
+	def event_foreground(self, obj, nextHandler):
+		# Forget the outputs of foreground windows which have been closed.
+		# Outputs of other foreground windows are kept, so their monitors keep their baselines while a dialog has the foreground.
+		for foregroundHandle, (hwnd, output) in list(self.outputCache.items()):
+			if not winUser.isWindow(foregroundHandle):
+				output.stopMonitoring()
+				del self.outputCache[foregroundHandle]
+		nextHandler()
+
+	def getScript(self, gesture):
+		if self.pendingReviewBottom is not None:
+			script = globalCommands.commands.getScript(gesture)
+			if script is not None and script.__name__.startswith("script_review_"):
+				self.applyPendingReviewBottom()
+		return super(AppModule, self).getScript(gesture)
+
+	def applyPendingReviewBottom(self):
+		"""Moves the review cursor to the bottom of the output which review_bottom spoke from its line cache."""
+		output = self.pendingReviewBottom
+		self.pendingReviewBottom = None
+		if winUser.isWindow(output.windowHandle):
+			api.setReviewPosition(output.makeTextInfo(textInfos.POSITION_LAST))
+
+	def event_appModule_gainFocus(self):
+		if self.settingsSwap.isApplied:
+			# Don't clobber the saved NVDA settings.
+			return
+		# The JMC configuration file is only read the first time, and kept in memory afterwards.
+		if not self.jmcConfig.load():
+			return
+		# Save the original NVDA settings, and apply the JMC ones which differ from them.
+		self.settingsSwap.apply(config.conf, self.jmcConfig)
+
+	def event_appModule_loseFocus(self):
+		if not self.settingsSwap.isApplied:
+			# Don't save what isn't there.
+			return
+		# Restore the original NVDA settings, and save the current ones for JMC.
+		# The file is only written, in the background, if a setting changed.
+		for (section, key), value in self.settingsSwap.restore(config.conf).items():
+			self.jmcConfig.set(section, key, value)
+		self.jmcConfig.save()
+
+	def script_review_bottom(self, gesture):
+		start = default_timer()
+		obj = api.getNavigatorObject()
+		line = obj.getBottomLine() if isinstance(obj, Output) and obj.isMonitoring else None
+		speech.cancelSpeech()
+		if line is not None:
+			# Speak the line the output monitor last read, and only move the review cursor if it is used.
+			obj.finishUtterance()
+			speech.speakText(line)
+			self.pendingReviewBottom = obj
+		else:
+			self.pendingReviewBottom = None
+			info = api.getReviewPosition().obj.makeTextInfo(textInfos.POSITION_LAST)
+			api.setReviewPosition(info)
+			info.expand(textInfos.UNIT_LINE)
+			if isinstance(info.obj, Output):
+				info.obj.finishUtterance()
+			speech.speakTextInfo(info, unit=textInfos.UNIT_LINE, reason=REASON_CARET)
+		log.debug(
+			"review_bottom took %.1f ms%s", (default_timer() - start) * 1000, "" if line is None else " from the line cache"
+		)
+	# Translators: Input help mode message for the review_bottom gesture.
+	script_review_bottom.__doc__ = _("Moves the review cursor to the bottom line of the current navigator object and speaks it")
+	script_review_bottom.category = SCRCAT_JMC
+
+	def getFocusOutput(self):
+		"""Returns the output of the focused input, or None if there isn't one."""
+		output = getattr(api.getFocusObject(), "_output", None)
+		if output is None:
+			# Translators: Reported when there is no output window for the focused control.
+			ui.message(_("No output window found."))
+		return output
+
+	def reportScrollbackLine(self, line, isEdge=False, edgeMessage=None):
+		if line is None:
+			# Translators: Reported when no output lines have been kept for review.
+			ui.message(_("Scrollback empty."))
+			return
+		if isEdge:
+			ui.message(edgeMessage)
+		ui.message(line)
+
+	def script_scrollback_previous(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			line, isEdge = output.scrollback.move(-1)
+			# Translators: Reported when reviewing the oldest line kept in the scrollback.
+			self.reportScrollbackLine(line, isEdge, _("Top:"))
+	# Translators: Input help mode message for the scrollback_previous gesture.
+	script_scrollback_previous.__doc__ = _("Reviews the previous line of output in the scrollback")
+	script_scrollback_previous.category = SCRCAT_JMC
+
+	def script_scrollback_next(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			line, isEdge = output.scrollback.move(1)
+			# Translators: Reported when reviewing the newest line kept in the scrollback.
+			self.reportScrollbackLine(line, isEdge, _("Bottom:"))
+	# Translators: Input help mode message for the scrollback_next gesture.
+	script_scrollback_next.__doc__ = _("Reviews the next line of output in the scrollback")
+	script_scrollback_next.category = SCRCAT_JMC
+
+	def script_scrollback_newest(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			self.reportScrollbackLine(output.scrollback.moveToNewest())
+	# Translators: Input help mode message for the scrollback_newest gesture.
+	script_scrollback_newest.__doc__ = _("Reviews the newest line of output in the scrollback")
+	script_scrollback_newest.category = SCRCAT_JMC
+
+	def script_scrollback_copy(self, gesture):
+		output = self.getFocusOutput()
+		if output is None:
+			return
+		lines = output.scrollback.getNewest(output.copyLines)
+		if not lines:
+			self.reportScrollbackLine(None)
+		elif api.copyToClip("\r\n".join(lines)):
+			# Translators: Reported when lines of output have been copied to the clipboard.
+			ui.message(_("{count} lines copied.").format(count=len(lines)))
+	# Translators: Input help mode message for the scrollback_copy gesture.
+	script_scrollback_copy.__doc__ = _("Copies the newest lines of output in the scrollback to the clipboard")
+	script_scrollback_copy.category = SCRCAT_JMC
+
+	def script_toggle_interrupt_chars(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForCharacters"]
+		config.conf[u"keyboard"][u"speechInterruptForCharacters"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on character press.
+		enabled = _("Interrupt on character press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on character press.
+		disabled = _("Interrupt on character press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_chars gesture.
+	script_toggle_interrupt_chars.__doc__ = _("Toggles the interrupting of speech when a character is pressed.")
+	script_toggle_interrupt_chars.category = SCRCAT_JMC
+
+	def script_toggle_interrupt_enter(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForEnter"]
+		config.conf[u"keyboard"][u"speechInterruptForEnter"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on enter press.
+		enabled = _("Interrupt on enter press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on enter press.
+		disabled = _("Interrupt on enter press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_enter gesture.
+	script_toggle_interrupt_enter.__doc__=_("Toggles the interrupting of speech when the enter key is pressed.")
+	script_toggle_interrupt_enter.category = SCRCAT_JMC
+
+	__gestures = {
+		"kb:NVDA+enter": "review_bottom",
+		"kb:NVDA+8": "toggle_interrupt_chars",
+		"kb:NVDA+9": "toggle_interrupt_enter",
+		"kb:alt+NVDA+upArrow": "scrollback_previous",
+		"kb:alt+NVDA+downArrow": "scrollback_next",
+		"kb:alt+NVDA+end": "scrollback_newest",
+		"kb:alt+NVDA+c": "scrollback_copy",
+	}
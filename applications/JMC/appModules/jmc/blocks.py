@@ -0,0 +1,84 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/jmc/blocks.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2020 Nick Stockton <nstockton@gmail.com>
+
+"""Suppression of repeated blocks of MUD output, such as room descriptions
+"""
+
+
+# Built-in Python Modules
+from collections import OrderedDict
+
+
+# The base and modulus of the polynomial hashes of blocks.
+HASH_BASE = 1000003
+HASH_MODULUS = (1 << 61) - 1
+
+
+class BlockSuppressor(object):
+	"""Shortens blocks of lines which were seen in an earlier update, such as a room description printed again when walking back and forth.
+	A block is a run of at least minLines lines between blank lines, prompts matched by promptRegex, and the ends of an update.
+	A line repeated several times in a row is never part of a block, so flood control can fold and count it.
+	Each block is fingerprinted by a polynomial hash which is extended as each of its lines is added, so no block is scanned twice.
+	Fingerprints are only matched against those of earlier updates, kept in a least recently used cache of up to maxBlocks blocks, so output which repeats within an update is never shortened.
+	A repeated block is replaced by cue, formatted with the block's first line as line.
+	"""
+
+	def __init__(self, minLines, maxBlocks, cue="{line}", promptRegex=None):
+		self.minLines = minLines
+		self.maxBlocks = maxBlocks
+		self.cue = cue
+		self.promptRegex = promptRegex
+		self._recent = OrderedDict()
+		# The number of repeated blocks which were shortened.
+		self.suppressedCount = 0
+
+	def _isBoundary(self, lines, index):
+		line = lines[index]
+		if not line.strip():
+			return True
+		if self.promptRegex is not None and self.promptRegex.search(line) is not None:
+			return True
+		return (index > 0 and lines[index - 1] == line) or (index + 1 < len(lines) and lines[index + 1] == line)
+
+	def apply(self, lines):
+		"""Returns lines with each repeated block shortened."""
+		result = []
+		# The fingerprints of the blocks in this update, which are only remembered once it has been checked.
+		fingerprints = []
+		block = []
+		fingerprint = 0
+		for index, line in enumerate(lines):
+			if not self._isBoundary(lines, index):
+				block.append(line)
+				fingerprint = (fingerprint * HASH_BASE + hash(line)) % HASH_MODULUS
+				continue
+			self._addBlock(block, fingerprint, result, fingerprints)
+			result.append(line)
+			block = []
+			fingerprint = 0
+		self._addBlock(block, fingerprint, result, fingerprints)
+		for fingerprint in fingerprints:
+			if fingerprint in self._recent:
+				# Move the block to the most recently used end.
+				del self._recent[fingerprint]
+			elif len(self._recent) >= self.maxBlocks:
+				self._recent.popitem(last=False)
+			self._recent[fingerprint] = None
+		return result
+
+	def _addBlock(self, block, fingerprint, result, fingerprints):
+		if len(block) < self.minLines:
+			result.extend(block)
+			return
+		# The length makes a collision between blocks of different sizes impossible.
+		fingerprint = (len(block), fingerprint)
+		fingerprints.append(fingerprint)
+		if fingerprint in self._recent:
+			self.suppressedCount += 1
+			result.append(self.cue.format(line=block[0]))
+		else:
+			result.extend(block)
@@ -0,0 +1,300 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/jmc/output.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2020 Nick Stockton <nstockton@gmail.com>
+
+"""Monitoring of the JMC output window
+"""
+
+
+# Built-in Python Modules
+import threading
+import time
+from timeit import default_timer
+
+# Built-in NVDA Modules
+import addonHandler
+import config
+import displayModel
+from logHandler import log
+from NVDAObjects.behaviors import LiveText
+from NVDAObjects.window import DisplayModelLiveText
+import queueHandler
+import speech
+import textInfos
+
+try:
+	from speech.commands import CallbackCommand
+except ImportError:
+	# NVDA < 2019.3.0.
+	CallbackCommand = None
+
+# Local Modules
+from .blocks import BlockSuppressor
+from .diff import getNewLines
+from .earcons import EarconTriggers
+from .flood import FloodControl
+from .prompt import PromptTracker
+from .rules import RuleEngine
+from .scrollback import Scrollback
+
+# Initialize translations
+addonHandler.initTranslation()
+
+# The defaults for the output settings, used until the configuration is loaded.
+DEFAULT_FOLD_DUPLICATES = True
+DEFAULT_MAX_LINE_AGE = 5.0
+DEFAULT_SCROLLBACK_LINES = 1000
+DEFAULT_COPY_LINES = 20
+DEFAULT_REPEATED_BLOCKS = "firstLine"
+DEFAULT_BLOCK_LINES = 3
+DEFAULT_BLOCK_CACHE_SIZE = 200
+
+
+class Output(DisplayModelLiveText):
+	"""The output window of a world.
+	Monitoring can be paused while the input doesn't have focus, rather than stopped.
+	The monitor thread and the lines it last read are kept while paused, so resuming only reports what changed in the meantime instead of reading a new baseline.
+	The output only ever scrolls up, so new text is found by matching the scroll offset, rather than by a general diff.
+	Reading, comparing and filtering the text all happen on the monitor thread.
+	Every new line is added to the scrollback, whether or not it is spoken.
+	Lines matching an earcon trigger have its sound played, on a thread of its own, and may be removed from speech.
+	Blocks of lines seen in an earlier update, such as the description of a room walked through before, are then shortened.
+	Prompts are reduced to the fields which changed, and lines are gagged and substituted by the configured rules last.
+	Only the lines to be spoken are passed to the main thread, through flood control.
+	Where NVDA can report when an utterance has been spoken, lines which arrive in the meantime wait in flood control, where duplicates are folded and stale lines dropped, rather than piling up in the synthesizer.
+	Where several worlds are monitored at once, a scheduler decides when each may speak, and the lines of a world without focus are prefixed with its name.
+	"""
+
+	def initOverlayClass(self):
+		self._isPaused = False
+		# The lines last read by the monitor thread.
+		self.lines = []
+		# Set once the monitor thread has read the lines which the first change is compared with.
+		self.baselineRead = threading.Event()
+		self.floodControl = FloodControl(DEFAULT_MAX_LINE_AGE, DEFAULT_FOLD_DUPLICATES)
+		self.earcons = EarconTriggers()
+		self.prompt = PromptTracker()
+		self.rules = RuleEngine()
+		self.blocks = self._makeBlockSuppressor(DEFAULT_REPEATED_BLOCKS, DEFAULT_BLOCK_LINES, DEFAULT_BLOCK_CACHE_SIZE)
+		self.scrollback = Scrollback(DEFAULT_SCROLLBACK_LINES)
+		# The number of the newest lines in the scrollback which are copied to the clipboard.
+		self.copyLines = DEFAULT_COPY_LINES
+		# The scheduler shared with the outputs of other worlds, if any, and the name this world is reported with when it doesn't have focus.
+		self.scheduler = None
+		self.worldName = None
+		self._isDeliveryQueued = False
+		# The time the last utterance was sent to the synthesizer, or None once it has been spoken.
+		self._utteranceTime = None
+		# Whether lines had to wait for the last utterance to be spoken.
+		self._isBehind = False
+		# The number of deliveries on the main thread, and the longest time one took.
+		self.deliveryCount = 0
+		self.maxDeliveryTime = 0.0
+
+	def applyConfig(self, conf):
+		"""Applies the output settings from the add-on configuration."""
+		section = conf["output"]
+		self.floodControl.foldDuplicates = section["foldDuplicates"]
+		self.floodControl.maxAge = section["maxLineAge"]
+		self.scrollback.resize(section["scrollbackLines"])
+		self.copyLines = section["copyLines"]
+		# Replace the earcon triggers, prompt tracker, rules and block suppressor in one go, since the monitor thread may be using them.
+		self.earcons = EarconTriggers.fromConfig(conf)
+		self.prompt = PromptTracker.fromConfig(conf)
+		self.rules = RuleEngine.fromConfig(conf)
+		self.blocks = self._makeBlockSuppressor(
+			section["repeatedBlocks"], section["blockLines"], section["blockCacheSize"]
+		)
+
+	def _makeBlockSuppressor(self, repeatedBlocks, minLines, maxBlocks):
+		"""Returns a block suppressor for the repeatedBlocks setting, or None if repeated blocks are spoken in full.
+		Prompts end blocks, so the prompt tracker must already be built.
+		"""
+		if repeatedBlocks == "speak":
+			return None
+		if repeatedBlocks == "cue":
+			# Translators: Spoken in place of a block of MUD output which was seen in an earlier update, such as a room description.
+			cue = _("Seen.")
+		else:
+			# Translators: Spoken in place of a block of MUD output which was seen in an earlier update, after the block's first line.
+			cue = _("{line}, seen")
+		return BlockSuppressor(minLines, maxBlocks, cue, self.prompt.regex)
+
+	@property
+	def isMonitoring(self):
+		return self._monitorThread is not None and not self._isPaused
+
+	@property
+	def isSpeaking(self):
+		"""Whether lines are waiting to be spoken, or the last utterance may still be being spoken."""
+		if len(self.floodControl):
+			return True
+		return (
+			self._utteranceTime is not None
+			and self.floodControl.clock() - self._utteranceTime < self.floodControl.maxAge
+		)
+
+	def getBottomLine(self):
+		"""Returns the last line which isn't blank from the lines last read by the monitor thread, or None if there isn't one."""
+		for line in reversed(self.lines):
+			if line.strip():
+				return line
+		return None
+
+	def pause(self):
+		"""Stops reporting changes until resumed, keeping the lines last read as the baseline."""
+		if self._monitorThread is None or self._isPaused:
+			return
+		self._isPaused = True
+		displayModel.requestTextChangeNotifications(self, False)
+
+	def resume(self):
+		"""Resumes reporting changes, comparing the output with the lines read before the pause.
+		Monitoring is started if it isn't running.
+		"""
+		if self._monitorThread is None:
+			self.startMonitoring()
+		elif self._isPaused:
+			self._isPaused = False
+			# The display model might be out of date.
+			self.redraw()
+			displayModel.requestTextChangeNotifications(self, True)
+			self._event.set()
+
+	def stopMonitoring(self):
+		self.baselineRead.clear()
+		if self._isPaused:
+			# Text change notifications were already cancelled when paused.
+			self._isPaused = False
+			LiveText.stopMonitoring(self)
+		else:
+			super(Output, self).stopMonitoring()
+
+	def _getTextLines(self):
+		# NVDA 2021.2 removed this from LiveText, which now reads the text as a single string.
+		return list(self.makeTextInfo(textInfos.POSITION_ALL).getTextInChunks(textInfos.UNIT_LINE))
+
+	def _calculateNewText(self, newLines, oldLines):
+		return getNewLines(oldLines, newLines)
+
+	def _processLines(self, lines):
+		"""Returns the lines to speak out of new lines. Called on the monitor thread.
+		Earcons are played whether or not NVDA reports dynamic content changes.
+		While it doesn't, only prompt changes are spoken, if the prompt tracker always speaks them.
+		"""
+		earcons = self.earcons
+		if earcons:
+			lines = earcons.apply(lines)
+		prompt = self.prompt
+		if not config.conf["presentation"]["reportDynamicContentChanges"]:
+			if prompt and prompt.alwaysSpeak:
+				return prompt.apply(lines, onlyChanges=True)
+			return []
+		# Blocks are found before prompts are reduced, since prompts end them.
+		blocks = self.blocks
+		if blocks is not None:
+			lines = blocks.apply(lines)
+		if prompt:
+			lines = prompt.apply(lines)
+		rules = self.rules
+		if rules:
+			lines = rules.apply(lines)
+		return lines
+
+	def _queueSpeech(self, lines):
+		"""Queues lines to be spoken on the main thread. Called on the monitor thread."""
+		self.floodControl.add(lines)
+		self._queueDelivery()
+
+	def _queueDelivery(self):
+		if not self._isDeliveryQueued:
+			self._isDeliveryQueued = True
+			queueHandler.queueFunction(queueHandler.eventQueue, self._deliverSpeech)
+
+	def _deliverSpeech(self):
+		"""Speaks the waiting lines on the main thread, as a single utterance.
+		If the last utterance is still being spoken, the lines are left to wait for it, unless it was sent more than the maximum line age ago, since it may have been cancelled.
+		Lines are also left to wait while the scheduler, if any, holds this world back.
+		"""
+		# Clear the flag before taking the lines, so lines added from now on queue another delivery.
+		self._isDeliveryQueued = False
+		if (
+			self._utteranceTime is not None
+			and self.floodControl.clock() - self._utteranceTime < self.floodControl.maxAge
+		):
+			self._isBehind = True
+			return
+		self._utteranceTime = None
+		scheduler = self.scheduler
+		if scheduler is not None and len(self.floodControl) and not scheduler.mayDeliver(self):
+			self._isBehind = True
+			return
+		start = default_timer()
+		lines, dropped = self.floodControl.take(self._isBehind)
+		self._isBehind = False
+		if not lines and not dropped:
+			return
+		text = []
+		if scheduler is not None and self.worldName and not scheduler.isFocused(self):
+			text.append(self.worldName)
+		if dropped:
+			# Translators: Reported before MUD output when lines were skipped to catch up.
+			text.append(_("{count} lines skipped.").format(count=dropped))
+		for line, count in lines:
+			if count > 1:
+				# Translators: A line of MUD output which arrived several times in a row.
+				line = _("{line}, times {count}").format(line=line, count=count)
+			text.append(line)
+		text = "\n".join(text)
+		if CallbackCommand is None:
+			self._reportNewText(text)
+		else:
+			self._utteranceTime = self.floodControl.clock()
+			speech.speak([text, CallbackCommand(self.finishUtterance)])
+		self.deliveryCount += 1
+		self.maxDeliveryTime = max(self.maxDeliveryTime, default_timer() - start)
+
+	def finishUtterance(self):
+		"""Forgets the utterance being spoken, once it has been spoken or cancelled, so waiting lines are delivered straight away."""
+		self._utteranceTime = None
+		if len(self.floodControl):
+			self._queueDelivery()
+
+	def _monitor(self):
+		try:
+			oldLines = self._getTextLines()
+		except Exception:
+			log.exception("Error getting initial lines")
+			oldLines = []
+		self.lines = oldLines
+		self.baselineRead.set()
+		while self._keepMonitoring:
+			self._event.wait()
+			if not self._keepMonitoring:
+				break
+			if self.STABILIZE_DELAY > 0:
+				# Wait for the text to stabilise.
+				time.sleep(self.STABILIZE_DELAY)
+				if not self._keepMonitoring:
+					break
+			self._event.clear()
+			if self._isPaused:
+				# Leave the changes to be compared with the old lines once resumed.
+				continue
+			try:
+				newLines = self._getTextLines()
+				outLines = self._calculateNewText(newLines, oldLines)
+				self.scrollback.add(outLines)
+				if outLines:
+					if len(outLines) == 1 and len(outLines[0].strip()) == 1:
+						# This is only a single character, which is probably just a typed character.
+						del outLines[0]
+					lines = self._processLines(outLines)
+					if lines:
+						self._queueSpeech(lines)
+				oldLines = self.lines = newLines
+			except Exception:
+				log.exception("Error getting lines or calculating new text")
@@ -0,0 +1,107 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/jmc/scrollback.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2020 Nick Stockton <nstockton@gmail.com>
+
+"""Scrollback of the JMC output, for reviewing lines after they scroll off screen
+"""
+
+
+# Built-in Python Modules
+import threading
+
+
+class RingBuffer(object):
+	"""A sequence with a fixed capacity, which discards its oldest items as new ones are appended.
+	Items are addressed by absolute index, counting every item ever appended, so an index keeps referring to the same item until it is discarded.
+	"""
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self._items = [None] * capacity
+		# The absolute index of the oldest item.
+		self.start = 0
+		# The absolute index one past the newest item.
+		self.end = 0
+
+	def __len__(self):
+		return self.end - self.start
+
+	def __getitem__(self, index):
+		if not self.start <= index < self.end:
+			raise IndexError("Ring buffer index out of range: {}".format(index))
+		return self._items[index % self.capacity]
+
+	def append(self, item):
+		if self.end - self.start == self.capacity:
+			self._items[self.start % self.capacity] = None
+			self.start += 1
+		self._items[self.end % self.capacity] = item
+		self.end += 1
+
+	def clamp(self, index):
+		"""Returns the nearest index to the given one which is in the buffer."""
+		return max(self.start, min(index, self.end - 1))
+
+
+class Scrollback(object):
+	"""The newest lines of a world's output, along with a review position.
+	Lines are added on the monitor thread and reviewed on the main thread.
+	Adding a line and moving the review position both take constant time, and memory is capped at maxLines lines.
+	"""
+
+	def __init__(self, maxLines):
+		self._lock = threading.Lock()
+		self.lines = RingBuffer(maxLines)
+		# The absolute index of the reviewed line, or None if no line has been reviewed.
+		self.position = None
+
+	@property
+	def maxLines(self):
+		return self.lines.capacity
+
+	def resize(self, maxLines):
+		"""Changes the number of lines kept, keeping as many of the newest lines as fit."""
+		with self._lock:
+			if maxLines == self.lines.capacity:
+				return
+			lines = RingBuffer(maxLines)
+			for index in range(max(self.lines.start, self.lines.end - maxLines), self.lines.end):
+				lines.append(self.lines[index])
+			self.lines = lines
+			self.position = None
+
+	def add(self, lines):
+		with self._lock:
+			for line in lines:
+				self.lines.append(line)
+
+	def move(self, offset):
+		"""Moves the review position offset lines towards the newest line, stopping at the oldest and newest lines.
+		Nothing having been reviewed counts as being just past the newest line.
+		Returns the line at the new position, and whether the position stopped short, or (None, True) if there are no lines.
+		"""
+		with self._lock:
+			lines = self.lines
+			if not lines:
+				return None, True
+			position = lines.end if self.position is None else self.position
+			self.position = lines.clamp(position + offset)
+			return lines[self.position], self.position != position + offset
+
+	def moveToNewest(self):
+		"""Moves the review position to the newest line and returns it, or None if there are no lines."""
+		with self._lock:
+			lines = self.lines
+			if not lines:
+				return None
+			self.position = lines.end - 1
+			return lines[self.position]
+
+	def getNewest(self, count):
+		"""Returns a list of up to count of the newest lines, oldest first."""
+		with self._lock:
+			lines = self.lines
+			return [lines[index] for index in range(max(lines.start, lines.end - count), lines.end)]
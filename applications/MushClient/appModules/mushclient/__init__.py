@@ -0,0 +1,432 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""App module for Mush Client
+"""
+
+
+# Built-in Python Modules
+import ctypes
+import os.path
+from timeit import default_timer
+
+# Built-in NVDA Modules
+import addonHandler
+import api
+import appModuleHandler
+import config
+import controlTypes
+import globalCommands
+from logHandler import log
+from NVDAObjects.IAccessible import getNVDAObjectFromEvent, ContentGenericClient, IAccessible
+from NVDAObjects.window import Window
+import oleacc
+import speech
+import textInfos
+import ui
+import windowUtils
+import winUser
+
+# Local Modules
+from .earcons import player as earconPlayer
+from .output import Output
+from .settings import AddonConfig, makeSpec, SettingsSwap
+from .worlds import DEFAULT_BACKGROUND_INTERVAL, SpeechScheduler
+
+# Initialize translations
+addonHandler.initTranslation()
+
+# Script category for Mush Client gestures.
+# Translators: The name of the Mush Client gestures category.
+SCRCAT_MUSH_CLIENT = _("Mush Client")
+
+
+try:
+	REASON_CARET = controlTypes.REASON_CARET
+except AttributeError:
+	# NVDA >= 2021.1.0.
+	REASON_CARET = controlTypes.OutputReason.CARET
+
+
+# NVDA settings which are swapped for the MushClient ones while MushClient has focus.
+# Each is a section, a key, and the spec used to validate it in the MushClient configuration file.
+SETTINGS = (
+	("presentation", "reportDynamicContentChanges", "boolean(default=False)"),
+	("reviewCursor", "followCaret", "boolean(default=False)"),
+	("keyboard", "speechInterruptForCharacters", "boolean(default=False)"),
+	("keyboard", "speechInterruptForEnter", "boolean(default=True)"),
+)
+
+# Settings of the add-on itself, with the spec used to validate each in the MushClient configuration file.
+OPTIONS = (
+	("output", "foldDuplicates", "boolean(default=True)"),
+	("output", "maxLineAge", "float(default=5.0, min=1.0)"),
+	("output", "scrollbackLines", "integer(default=1000, min=1)"),
+	("output", "copyLines", "integer(default=20, min=1)"),
+	# A block of at least blockLines lines seen in an earlier update is spoken in full, as its first line followed by a short cue, or as just the cue.
+	("output", "repeatedBlocks", 'option("speak", "firstLine", "cue", default="firstLine")'),
+	("output", "blockLines", "integer(default=3, min=2)"),
+	("output", "blockCacheSize", "integer(default=200, min=1)"),
+	# Each gag is a name and a pattern, and each substitution is a name, a pattern, and a replacement.
+	("gags", "__many__", "string"),
+	("substitutions", "__many__", "string_list(min=2, max=2)"),
+	# Each earcon is a name, a pattern, a tone such as 880:40 or a wave file, and optionally gag to remove matched lines from speech.
+	("earcons", "__many__", "string_list(min=2, max=3)"),
+	# The prompt pattern names each field with a group, and a field's threshold is the change needed to report it.
+	("prompt", "pattern", 'string(default="")'),
+	# Prompt changes are spoken even while NVDA doesn't report dynamic content changes, unless alwaysSpeak is off.
+	("prompt", "alwaysSpeak", "boolean(default=True)"),
+	("promptThresholds", "__many__", "float(min=0.0)"),
+	# Worlds without focus are spoken with their name first, and no more than once every backgroundInterval seconds.
+	("worlds", "monitorBackground", "boolean(default=True)"),
+	("worlds", "backgroundInterval", "float(default=3.0, min=0.0)"),
+)
+
+# Define default values in case the configuration file doesn't exist.
+CONFIG_SPEC = "\n".join(makeSpec(SETTINGS + OPTIONS))
+
+# The number of accessibility calls made to walk from a world's input to its output.
+OUTPUT_WALK_HOPS = 8
+
+# The control ID of the output window of each world.
+OUTPUT_CONTROL_ID = 59648
+
+
+def findOutputWindows(parent):
+	"""Returns the handles of the output windows of every world under parent, in a single pass over the window tree."""
+	found = []
+	@windowUtils.WNDENUMPROC
+	def callback(window, data):
+		if (
+			winUser.getControlID(window) == OUTPUT_CONTROL_ID
+			and winUser.getClassName(window).startswith("AfxFrameOrView")
+		):
+			found.append(window)
+		return True
+	ctypes.windll.user32.EnumChildWindows(parent, callback, 0)
+	return found
+
+
+def getWorldName(hwnd):
+	"""Returns the title of the MDI child window holding the window with the given handle, which MushClient sets to the world name.
+	Returns None if the window isn't in an MDI child window.
+	"""
+	while hwnd:
+		parent = winUser.getAncestor(hwnd, winUser.GA_PARENT)
+		if parent and winUser.getClassName(parent) == "MDIClient":
+			return winUser.getWindowText(hwnd) or None
+		hwnd = parent
+	return None
+
+
+class Input(Window):
+	def event_gainFocus(self):
+		super(Input, self).event_gainFocus()
+		output = self.appModule.getOutput(self)
+		self.appModule.monitorWorlds(output)
+		if output is not None:
+			output.resume()
+			api.setNavigatorObject(output)
+			output.TextInfo.stripOuterWhitespace = True
+			self._output = output
+		else:
+			self._output = None
+
+	def event_typedCharacter(self, ch):
+		super(Input, self).event_typedCharacter(ch)
+		if self._output:
+			# Typing may have cancelled speech, so new output shouldn't wait for an utterance which may never finish.
+			self._output.finishUtterance()
+
+	def event_loseFocus(self):
+		if self._output:
+			self.appModule.scheduler.focused = None
+			if not self.appModule.isMonitoringBackground:
+				# Keep the output monitored, so it doesn't need a new baseline when the input gets focus again.
+				self._output.pause()
+
+
+class AppModule(appModuleHandler.AppModule):
+	def __init__(self, *args, **kwargs):
+		super(AppModule, self).__init__(*args, **kwargs)
+		path = os.path.join(addonHandler.getCodeAddon().path, "config.ini")
+		self.mushclientConfig = AddonConfig(path, CONFIG_SPEC, "MushClient")
+		self.settingsSwap = SettingsSwap((section, key) for section, key, spec in SETTINGS)
+		# The output of each world, keyed by the window handle of the world's input.
+		self.outputCache = {}
+		# The output of every world known to be open, keyed by its window handle.
+		self.worlds = {}
+		self.scheduler = SpeechScheduler(DEFAULT_BACKGROUND_INTERVAL)
+		# The number of output lookups answered from the cache, and the number which walked the object tree.
+		self.outputCacheHits = 0
+		self.outputCacheMisses = 0
+		# The output whose review cursor should be moved to the bottom before it is next used, if any.
+		self.pendingReviewBottom = None
+
+	def terminate(self):
+		self.mushclientConfig.flush()
+		for output in self.worlds.values():
+			output.stopMonitoring()
+		self.worlds.clear()
+		self.outputCache.clear()
+		earconPlayer.stop()
+		super(AppModule, self).terminate()
+
+	def chooseNVDAObjectOverlayClasses(self, obj, clsList):
+		if (
+			isinstance(obj, IAccessible)
+			and obj.windowClassName.startswith("AfxFrameOrView")
+			and obj.windowControlID == 59648
+			and obj.IAccessibleRole == oleacc.ROLE_SYSTEM_CLIENT
+		):
+			try:
+				clsList.remove(ContentGenericClient)
+			except ValueError:
+				pass
+			clsList.insert(0, Output)
+		elif (
+			isinstance(obj, IAccessible)
+			and obj.windowClassName == "Edit"
+			and obj.windowControlID == 59664
+			and obj.IAccessibleRole == oleacc.ROLE_SYSTEM_TEXT
+		):
+			clsList.insert(0, Input)
+
+	def getOutput(self, obj):
+		"""Returns the output of the world with the given input, or None if it can't be found.
+		MushClient worlds share a single top-level window, so each output is cached by the window handle of its input.
+		A cached output is only used while its window still exists, so the object tree is walked the first time a world's input gets focus.
+		"""
+		output = self.outputCache.get(obj.windowHandle)
+		if output is not None and winUser.isWindow(output.windowHandle):
+			self.outputCacheHits += 1
+			log.debug(
+				"MushClient output found in cache, %d accessibility calls saved so far",
+				self.outputCacheHits * OUTPUT_WALK_HOPS,
+			)
+			return output
+		self.outputCacheMisses += 1
+		self.forgetClosedWorlds()
+		try:
+			output = obj.parent.parent.parent.parent.firstChild.firstChild.firstChild.firstChild
+		except AttributeError:
+			output = None
+		if not isinstance(output, Output):
+			return None
+		if output.windowHandle in self.worlds:
+			# The world is already monitored in the background.
+			output = self.worlds[output.windowHandle]
+		else:
+			self.addWorld(output)
+		self.outputCache[obj.windowHandle] = output
+		return output
+
+	def addWorld(self, output):
+		"""Configures the output of a newly found world, and returns it."""
+		if self.mushclientConfig.load():
+			output.applyConfig(self.mushclientConfig)
+			self.scheduler.interval = self.mushclientConfig["worlds"]["backgroundInterval"]
+		output.scheduler = self.scheduler
+		output.worldName = getWorldName(output.windowHandle)
+		self.worlds[output.windowHandle] = output
+		return output
+
+	def forgetClosedWorlds(self):
+		for hwnd, output in list(self.worlds.items()):
+			if not winUser.isWindow(hwnd):
+				output.stopMonitoring()
+				self.scheduler.forget(output)
+				del self.worlds[hwnd]
+		for key, output in list(self.outputCache.items()):
+			if not winUser.isWindow(output.windowHandle):
+				del self.outputCache[key]
+
+	@property
+	def isMonitoringBackground(self):
+		return self.mushclientConfig.load() and self.mushclientConfig["worlds"]["monitorBackground"]
+
+	def monitorWorlds(self, focused):
+		"""Gives the focused output priority, and monitors the output of every other open world in the background if enabled.
+		Worlds opened since the last call are found in a single pass over the window tree.
+		"""
+		self.scheduler.focused = focused
+		if not self.isMonitoringBackground:
+			return
+		self.forgetClosedWorlds()
+		for hwnd in findOutputWindows(api.getForegroundObject().windowHandle):
+			output = self.worlds.get(hwnd)
+			if output is None:
+				output = getNVDAObjectFromEvent(hwnd=hwnd, objectID=winUser.OBJID_CLIENT, childID=0)
+				if not isinstance(output, Output):
+					continue
+				self.addWorld(output)
+			if output is not focused:
+				output.resume()
+
+	def getScript(self, gesture):
+		if self.pendingReviewBottom is not None:
+			script = globalCommands.commands.getScript(gesture)
+			if script is not None and script.__name__.startswith("script_review_"):
+				self.applyPendingReviewBottom()
+		return super(AppModule, self).getScript(gesture)
+
+	def applyPendingReviewBottom(self):
+		"""Moves the review cursor to the bottom of the output which review_bottom spoke from its line cache."""
+		output = self.pendingReviewBottom
+		self.pendingReviewBottom = None
+		if winUser.isWindow(output.windowHandle):
+			api.setReviewPosition(output.makeTextInfo(textInfos.POSITION_LAST))
+
+	def event_appModule_gainFocus(self):
+		if self.settingsSwap.isApplied:
+			# Don't clobber the saved NVDA settings.
+			return
+		# The MushClient configuration file is only read the first time, and kept in memory afterwards.
+		if not self.mushclientConfig.load():
+			return
+		# Save the original NVDA settings, and apply the MushClient ones which differ from them.
+		self.settingsSwap.apply(config.conf, self.mushclientConfig)
+
+	def event_appModule_loseFocus(self):
+		# Background worlds are only spoken while MushClient has focus.
+		for output in self.worlds.values():
+			output.pause()
+		if not self.settingsSwap.isApplied:
+			# Don't save what isn't there.
+			return
+		# Restore the original NVDA settings, and save the current ones for MushClient.
+		# The file is only written, in the background, if a setting changed.
+		for (section, key), value in self.settingsSwap.restore(config.conf).items():
+			self.mushclientConfig.set(section, key, value)
+		self.mushclientConfig.save()
+
+	def script_review_bottom(self, gesture):
+		start = default_timer()
+		obj = api.getNavigatorObject()
+		line = obj.getBottomLine() if isinstance(obj, Output) and obj.isMonitoring else None
+		speech.cancelSpeech()
+		if line is not None:
+			# Speak the line the output monitor last read, and only move the review cursor if it is used.
+			obj.finishUtterance()
+			speech.speakText(line)
+			self.pendingReviewBottom = obj
+		else:
+			self.pendingReviewBottom = None
+			info = api.getReviewPosition().obj.makeTextInfo(textInfos.POSITION_LAST)
+			api.setReviewPosition(info)
+			info.expand(textInfos.UNIT_LINE)
+			if isinstance(info.obj, Output):
+				info.obj.finishUtterance()
+			speech.speakTextInfo(info, unit=textInfos.UNIT_LINE, reason=REASON_CARET)
+		log.debug(
+			"review_bottom took %.1f ms%s", (default_timer() - start) * 1000, "" if line is None else " from the line cache"
+		)
+	# Translators: Input help mode message for the review_bottom gesture.
+	script_review_bottom.__doc__ = _(
+		"Moves the review cursor to the bottom line of the current navigator object and speaks it"
+	)
+	script_review_bottom.category = SCRCAT_MUSH_CLIENT
+
+	def getFocusOutput(self):
+		"""Returns the output of the focused input, or None if there isn't one."""
+		output = getattr(api.getFocusObject(), "_output", None)
+		if output is None:
+			# Translators: Reported when there is no output window for the focused control.
+			ui.message(_("No output window found."))
+		return output
+
+	def reportScrollbackLine(self, line, isEdge=False, edgeMessage=None):
+		if line is None:
+			# Translators: Reported when no output lines have been kept for review.
+			ui.message(_("Scrollback empty."))
+			return
+		if isEdge:
+			ui.message(edgeMessage)
+		ui.message(line)
+
+	def script_scrollback_previous(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			line, isEdge = output.scrollback.move(-1)
+			# Translators: Reported when reviewing the oldest line kept in the scrollback.
+			self.reportScrollbackLine(line, isEdge, _("Top:"))
+	# Translators: Input help mode message for the scrollback_previous gesture.
+	script_scrollback_previous.__doc__ = _("Reviews the previous line of output in the scrollback")
+	script_scrollback_previous.category = SCRCAT_MUSH_CLIENT
+
+	def script_scrollback_next(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			line, isEdge = output.scrollback.move(1)
+			# Translators: Reported when reviewing the newest line kept in the scrollback.
+			self.reportScrollbackLine(line, isEdge, _("Bottom:"))
+	# Translators: Input help mode message for the scrollback_next gesture.
+	script_scrollback_next.__doc__ = _("Reviews the next line of output in the scrollback")
+	script_scrollback_next.category = SCRCAT_MUSH_CLIENT
+
+	def script_scrollback_newest(self, gesture):
+		output = self.getFocusOutput()
+		if output is not None:
+			self.reportScrollbackLine(output.scrollback.moveToNewest())
+	# Translators: Input help mode message for the scrollback_newest gesture.
+	script_scrollback_newest.__doc__ = _("Reviews the newest line of output in the scrollback")
+	script_scrollback_newest.category = SCRCAT_MUSH_CLIENT
+
+	def script_scrollback_copy(self, gesture):
+		output = self.getFocusOutput()
+		if output is None:
+			return
+		lines = output.scrollback.getNewest(output.copyLines)
+		if not lines:
+			self.reportScrollbackLine(None)
+		elif api.copyToClip("\r\n".join(lines)):
+			# Translators: Reported when lines of output have been copied to the clipboard.
+			ui.message(_("{count} lines copied.").format(count=len(lines)))
+	# Translators: Input help mode message for the scrollback_copy gesture.
+	script_scrollback_copy.__doc__ = _("Copies the newest lines of output in the scrollback to the clipboard")
+	script_scrollback_copy.category = SCRCAT_MUSH_CLIENT
+
+	def script_toggle_interrupt_chars(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForCharacters"]
+		config.conf[u"keyboard"][u"speechInterruptForCharacters"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on character press.
+		enabled = _("Interrupt on character press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on character press.
+		disabled = _("Interrupt on character press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_chars gesture.
+	script_toggle_interrupt_chars.__doc__ = _(
+		"Toggles the interrupting of speech when a character is pressed."
+	)
+	script_toggle_interrupt_chars.category = SCRCAT_MUSH_CLIENT
+
+	def script_toggle_interrupt_enter(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForEnter"]
+		config.conf[u"keyboard"][u"speechInterruptForEnter"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on enter press.
+		enabled = _("Interrupt on enter press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on enter press.
+		disabled = _("Interrupt on enter press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_enter gesture.
+	script_toggle_interrupt_enter.__doc__ = _(
+		"Toggles the interrupting of speech when the enter key is pressed."
+	)
+	script_toggle_interrupt_enter.category = SCRCAT_MUSH_CLIENT
+
+	__gestures = {
+		"kb:NVDA+enter": "review_bottom",
+		"kb:numpadEnter": "review_bottom",
+		"kb:NVDA+8": "toggle_interrupt_chars",
+		"kb:NVDA+9": "toggle_interrupt_enter",
+		"kb:alt+NVDA+upArrow": "scrollback_previous",
+		"kb:alt+NVDA+downArrow": "scrollback_next",
+		"kb:alt+NVDA+end": "scrollback_newest",
+		"kb:alt+NVDA+c": "scrollback_copy",
+	}
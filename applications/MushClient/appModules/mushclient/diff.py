@@ -0,0 +1,79 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/diff.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Detection of the lines scrolled into the MushClient output window
+"""
+
+
+def stripBlankLines(lines):
+	"""Returns lines without any trailing blank lines."""
+	end = len(lines)
+	while end and not lines[end - 1].strip():
+		end -= 1
+	return lines[:end]
+
+
+def getFailureTable(values):
+	"""Returns the Knuth-Morris-Pratt failure table of values.
+	Item i is the length of the longest proper prefix of values[:i + 1] which is also a suffix of it.
+	"""
+	table = [0] * len(values)
+	length = 0
+	for i in range(1, len(values)):
+		while length and values[i] != values[length]:
+			length = table[length - 1]
+		if values[i] == values[length]:
+			length += 1
+		table[i] = length
+	return table
+
+
+def getOverlap(oldValues, newValues, table):
+	"""Returns the length of the longest suffix of oldValues which is also a prefix of newValues.
+	table is the failure table of newValues, so the search takes linear time.
+	"""
+	if not newValues:
+		return 0
+	length = 0
+	for value in oldValues:
+		if length == len(newValues):
+			length = table[length - 1]
+		while length and value != newValues[length]:
+			length = table[length - 1]
+		if value == newValues[length]:
+			length += 1
+	return length
+
+
+def verifyOverlap(oldLines, newLines, overlap, table):
+	"""Returns the longest overlap of oldLines and newLines, no longer than overlap, whose lines are equal and not just their hashes.
+	overlap was found by comparing hashes, and table is the failure table of the hashes of newLines.
+	The shorter overlaps whose hashes match are the borders of the matched prefix, so only those are tried, longest first.
+	"""
+	while overlap and oldLines[len(oldLines) - overlap:] != newLines[:overlap]:
+		# The hashes of two different lines collided.
+		overlap = table[overlap - 1]
+	return overlap
+
+
+def getNewLines(oldLines, newLines):
+	"""Returns the lines at the bottom of newLines which weren't in oldLines, assuming the output only scrolls up.
+	The scroll offset is found by matching the hashes of the old lines against those of the new lines, in linear time, and the lines of the match are then compared in case of a hash collision.
+	If nothing overlaps, the search is repeated without the last old line, since it may have been a partial line which has since been completed.
+	"""
+	newLines = stripBlankLines(newLines)
+	if not newLines:
+		return []
+	# Only the old lines which could still be on screen can overlap the new ones.
+	oldLines = stripBlankLines(oldLines)[-len(newLines):]
+	newHashes = [hash(line) for line in newLines]
+	oldHashes = [hash(line) for line in oldLines]
+	table = getFailureTable(newHashes)
+	overlap = verifyOverlap(oldLines, newLines, getOverlap(oldHashes, newHashes, table), table)
+	if not overlap and len(oldLines) > 1:
+		overlap = verifyOverlap(oldLines[:-1], newLines, getOverlap(oldHashes[:-1], newHashes, table), table)
+	return newLines[overlap:]
@@ -0,0 +1,197 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/earcons.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Sounds played for MushClient output lines which match triggers
+"""
+
+
+# Built-in Python Modules
+import os.path
+try:
+	from Queue import Empty, Full, Queue
+except ImportError:
+	# Python3
+	from queue import Empty, Full, Queue
+import re
+import threading
+import time
+
+# Built-in NVDA Modules
+from logHandler import log
+import nvwave
+import tones
+
+# Local Modules
+from .rules import Matcher
+
+
+# A tone is a frequency in hertz, optionally followed by a colon and a duration in milliseconds, such as 880:40.
+TONE_REGEX = re.compile(r"^(\d+(?:\.\d+)?)(?::(\d+))?$")
+
+DEFAULT_TONE_DURATION = 40
+
+# The most sounds waiting to be played, beyond which new ones are dropped rather than lagging behind the output.
+MAX_PENDING_SOUNDS = 8
+
+# The optional third item of a trigger, which removes the lines it matches from speech.
+GAG_FLAG = "gag"
+
+
+class Earcon(object):
+	"""A tone, or a wave file, to be played."""
+
+	__slots__ = ("frequency", "duration", "path")
+
+	def __init__(self, frequency=None, duration=DEFAULT_TONE_DURATION, path=None):
+		self.frequency = frequency
+		self.duration = duration
+		self.path = path
+
+	@classmethod
+	def parse(cls, sound, directory):
+		"""Parses a tone, such as 880:40, or else the path of a wave file relative to directory."""
+		match = TONE_REGEX.match(sound.strip())
+		if match is None:
+			return cls(path=os.path.join(directory, sound))
+		frequency, duration = match.groups()
+		return cls(float(frequency), DEFAULT_TONE_DURATION if duration is None else int(duration))
+
+	def play(self):
+		"""Plays the sound, returning once it has finished.
+		tones.beep returns straight away, and cuts off any tone still playing, so the tone's duration is waited out here.
+		"""
+		if self.path is None:
+			tones.beep(self.frequency, self.duration)
+			time.sleep(self.duration / 1000.0)
+		else:
+			nvwave.playWaveFile(self.path, False)
+
+
+class EarconPlayer(object):
+	"""Plays earcons one at a time on a thread of its own, so neither the monitor thread nor the main thread ever waits for audio.
+	The thread is started when the first earcon is queued.
+	"""
+
+	def __init__(self, maxPending=MAX_PENDING_SOUNDS):
+		self.maxPending = maxPending
+		self._lock = threading.Lock()
+		self._queue = None
+		# The number of earcons played, and the number dropped because too many were waiting.
+		self.playedCount = 0
+		self.droppedCount = 0
+
+	def play(self, earcon):
+		"""Queues earcon to be played, or drops it if too many earcons are waiting."""
+		with self._lock:
+			if self._queue is None:
+				self._queue = Queue(self.maxPending)
+				thread = threading.Thread(target=self._run, args=(self._queue,), name="EarconPlayer")
+				thread.daemon = True
+				thread.start()
+			queue = self._queue
+		try:
+			queue.put_nowait(earcon)
+		except Full:
+			self.droppedCount += 1
+
+	def stop(self):
+		"""Drops the waiting earcons, and stops the thread once it has played the current one."""
+		with self._lock:
+			queue = self._queue
+			self._queue = None
+		if queue is None:
+			return
+		try:
+			while True:
+				queue.get_nowait()
+		except Empty:
+			pass
+		queue.put_nowait(None)
+
+	def _run(self, queue):
+		while True:
+			earcon = queue.get()
+			if earcon is None:
+				break
+			try:
+				earcon.play()
+			except Exception:
+				log.exception("Error playing earcon")
+			self.playedCount += 1
+
+
+# The player shared by the outputs of every world.
+player = EarconPlayer()
+
+
+class Trigger(object):
+	__slots__ = ("name", "regex", "earcon", "gag")
+
+	def __init__(self, name, regex, earcon, gag=False):
+		self.name = name
+		self.regex = regex
+		self.earcon = earcon
+		self.gag = gag
+
+
+class EarconTriggers(object):
+	"""Plays an earcon for output lines which match a trigger, without waiting for it to be played.
+	A line is matched by the first trigger, in the order given, whose pattern it matches, and is removed from speech if that trigger gags.
+	Each earcon is only played once for the lines of one update, so a burst of matching lines doesn't queue a burst of sounds.
+	"""
+
+	def __init__(self, triggers=(), player=player):
+		self.matcher = Matcher(triggers)
+		self.player = player
+		# The number of lines matched by a trigger.
+		self.triggeredCount = 0
+
+	@classmethod
+	def fromConfig(cls, conf):
+		"""Builds the triggers from the earcons section of the add-on configuration.
+		Each trigger is a name and a list of a pattern, a sound, and optionally the word gag.
+		Wave files are found relative to the directory of the configuration file.
+		"""
+		directory = os.path.dirname(conf.path)
+		triggers = []
+		for name, items in conf["earcons"].items():
+			pattern, sound = items[:2]
+			try:
+				regex = re.compile(pattern)
+			except re.error:
+				log.warning("Invalid pattern in earcon %s: %s", name, pattern, exc_info=True)
+				continue
+			earcon = Earcon.parse(sound, directory)
+			if earcon.path is not None and not os.path.isfile(earcon.path):
+				log.warning("Wave file for earcon %s not found: %s", name, earcon.path)
+				continue
+			gag = len(items) > 2 and items[2].strip().lower() == GAG_FLAG
+			triggers.append(Trigger(name, regex, earcon, gag))
+		return cls(triggers)
+
+	def __bool__(self):
+		return bool(self.matcher)
+
+	__nonzero__ = __bool__
+
+	def apply(self, lines):
+		"""Plays the earcons of the triggers matched by lines, and returns the lines which aren't gagged."""
+		result = []
+		earcons = []
+		for line in lines:
+			trigger = self.matcher.search(line)
+			if trigger is None:
+				result.append(line)
+				continue
+			self.triggeredCount += 1
+			if trigger.earcon not in earcons:
+				earcons.append(trigger.earcon)
+			if not trigger.gag:
+				result.append(line)
+		for earcon in earcons:
+			self.player.play(earcon)
+		return result
@@ -0,0 +1,64 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/flood.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Flood control for the lines waiting to be spoken
+"""
+
+
+# Built-in Python Modules
+from collections import deque
+import threading
+import time
+
+
+class FloodControl(object):
+	"""Holds the lines waiting to be spoken, folding consecutive duplicates into a single line with a count.
+	When speech falls behind, lines which have waited longer than maxAge seconds are dropped.
+	Lines are added on the monitor thread and taken on the main thread.
+	The clock can be replaced, so the timing can be driven by hand.
+	"""
+
+	def __init__(self, maxAge, foldDuplicates=True, clock=time.time):
+		self.maxAge = maxAge
+		self.foldDuplicates = foldDuplicates
+		self.clock = clock
+		self._lock = threading.Lock()
+		# Each item is a list of the time the line last arrived, the line, and the number of times it arrived.
+		self._pending = deque()
+		# The number of lines folded into the line before them, and the number dropped for being too old.
+		self.foldedCount = 0
+		self.droppedCount = 0
+
+	def __len__(self):
+		return len(self._pending)
+
+	def add(self, lines):
+		now = self.clock()
+		with self._lock:
+			for line in lines:
+				if self.foldDuplicates and self._pending and self._pending[-1][1] == line:
+					item = self._pending[-1]
+					item[0] = now
+					item[2] += 1
+					self.foldedCount += 1
+				else:
+					self._pending.append([now, line, 1])
+
+	def take(self, isBehind=False):
+		"""Forgets the waiting lines, and returns them as a list of (line, count) tuples, along with the number of lines dropped.
+		If isBehind, lines which have waited longer than maxAge seconds are dropped.
+		"""
+		now = self.clock()
+		with self._lock:
+			pending = self._pending
+			self._pending = deque()
+		dropped = 0
+		if isBehind:
+			while pending and now - pending[0][0] > self.maxAge:
+				dropped += pending.popleft()[2]
+		self.droppedCount += dropped
+		return [(line, count) for lineTime, line, count in pending], dropped
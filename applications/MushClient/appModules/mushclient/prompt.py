@@ -0,0 +1,91 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/prompt.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Tracking of the fields in MUD prompt lines
+"""
+
+
+# Built-in Python Modules
+import re
+
+# Built-in NVDA Modules
+from logHandler import log
+
+
+class PromptTracker(object):
+	"""Recognises prompts with a single pattern, whose named groups are the fields of the prompt, such as <(?P<hp>\\d+)hp (?P<mp>\\d+)mp>.
+	A prompt is replaced by the fields which changed since they were last reported, or dropped if none did.
+	A field with a threshold is only reported once its numeric value has moved by at least that much from the value last reported.
+	If alwaysSpeak, the changes are spoken even while NVDA doesn't report dynamic content changes.
+	"""
+
+	def __init__(self, pattern=None, thresholds=None, alwaysSpeak=True):
+		self.regex = None if not pattern else re.compile(pattern)
+		self.alwaysSpeak = alwaysSpeak
+		groupindex = {} if self.regex is None else self.regex.groupindex
+		# The names of the fields, in the order they appear in the pattern.
+		self.fields = sorted(groupindex, key=groupindex.get)
+		self.thresholds = dict(thresholds or {})
+		# The last parsed, and the last reported, value of each field.
+		self.values = {}
+		self.reported = {}
+
+	@classmethod
+	def fromConfig(cls, conf):
+		"""Builds a tracker from the prompt and promptThresholds sections of the add-on configuration."""
+		pattern = conf["prompt"]["pattern"]
+		try:
+			return cls(pattern, conf["promptThresholds"], conf["prompt"]["alwaysSpeak"])
+		except re.error:
+			log.warning("Invalid prompt pattern: %s", pattern, exc_info=True)
+			return cls()
+
+	def __bool__(self):
+		return bool(self.fields)
+
+	__nonzero__ = __bool__
+
+	def apply(self, lines, onlyChanges=False):
+		"""Returns lines with each prompt replaced by its changed fields.
+		Any text after a prompt on the same line is kept as a line of its own.
+		If onlyChanges, only the changed fields are returned, and the other lines are dropped.
+		"""
+		result = []
+		for line in lines:
+			match = self.regex.search(line)
+			if match is None:
+				if not onlyChanges:
+					result.append(line)
+				continue
+			changes = self._update(match)
+			if changes:
+				result.append(", ".join(changes))
+			rest = (line[: match.start()] + line[match.end() :]).strip()
+			if rest and not onlyChanges:
+				result.append(rest)
+		return result
+
+	def _update(self, match):
+		changes = []
+		for field in self.fields:
+			value = match.group(field)
+			if value is None:
+				continue
+			self.values[field] = value
+			last = self.reported.get(field)
+			if value == last:
+				continue
+			threshold = self.thresholds.get(field)
+			if threshold is not None and last is not None:
+				try:
+					if abs(float(value) - float(last)) < threshold:
+						continue
+				except ValueError:
+					pass
+			self.reported[field] = value
+			changes.append("{} {}".format(field, value))
+		return changes
@@ -0,0 +1,249 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/rules.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Gagging and substitution of MushClient output lines
+"""
+
+
+# Built-in Python Modules
+import re
+
+# Built-in NVDA Modules
+from logHandler import log
+
+
+WORD_REGEX = re.compile(r"\w+", re.UNICODE)
+
+DEFAULT_FLAGS = re.compile("").flags
+
+# Patterns which refer to their own groups, whose numbers would change if they were combined with other patterns.
+GROUP_REFERENCE_REGEX = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+def getRequiredRuns(pattern):
+	"""Returns the runs of literal text which every match of pattern must contain.
+	Only text outside of groups and character classes is considered, and nothing is returned for a pattern with alternatives at the top level.
+	"""
+	runs = []
+	run = []
+	depth = 0
+	i = 0
+	while i < len(pattern):
+		char = pattern[i]
+		i += 1
+		if char == "\\":
+			escaped = pattern[i : i + 1]
+			i += 1
+			if depth == 0 and escaped and not escaped.isalnum():
+				run.append(escaped)
+				continue
+		elif char == "[":
+			# Skip the character class, which may start with a literal ].
+			if pattern[i : i + 1] == "^":
+				i += 1
+			if pattern[i : i + 1] == "]":
+				i += 1
+			while i < len(pattern) and pattern[i] != "]":
+				i += 2 if pattern[i] == "\\" else 1
+			i += 1
+		elif char == "(":
+			depth += 1
+		elif char == ")":
+			depth -= 1
+		elif depth > 0:
+			continue
+		elif char == "|":
+			return []
+		elif char in "*?{":
+			# The character before the quantifier may not be there at all.
+			if run:
+				run.pop()
+			if char == "{":
+				end = pattern.find("}", i)
+				i = len(pattern) if end < 0 else end + 1
+		elif char not in ".^$+":
+			run.append(char)
+			continue
+		if run:
+			runs.append("".join(run))
+			run = []
+	if run:
+		runs.append("".join(run))
+	return runs
+
+
+def getKeyWord(regex):
+	"""Returns a whole word which every line matched by regex must contain, or None if there isn't one.
+	Words at either end of a run of literal text are ignored, since the text next to them in a line isn't known.
+	"""
+	if regex.flags != DEFAULT_FLAGS:
+		return None
+	words = []
+	for run in getRequiredRuns(regex.pattern):
+		for match in WORD_REGEX.finditer(run):
+			if match.start() > 0 and match.end() < len(run):
+				words.append(match.group())
+	# Longer words are likely to be rarer, so fewer rules are tried for each line.
+	return max(words, key=len) if words else None
+
+
+def combinePatterns(rules, indexes, anchored=False):
+	"""Compiles the patterns of the rules with the given indexes into alternations, which match a line if any of the rules would.
+	If anchored is True, every pattern starts with ^, which is moved in front of the alternation so that it is only tried at the start of a line.
+	Returns a list of tuples of an alternation and the indexes of the rules it combines, along with the indexes of the rules which couldn't be combined.
+	Rules are split over several alternations when they can't all be compiled into one, such as when Python 2 runs out of groups.
+	"""
+	start = 1 if anchored else 0
+	alternatives = "|".join("(?:" + rules[index].regex.pattern[start:] + ")" for index in indexes)
+	try:
+		return [(re.compile("^(?:" + alternatives + ")" if anchored else alternatives), indexes)], []
+	except (AssertionError, OverflowError, re.error):
+		if len(indexes) == 1:
+			return [], list(indexes)
+	middle = len(indexes) // 2
+	first, firstUncombined = combinePatterns(rules, indexes[:middle], anchored)
+	second, secondUncombined = combinePatterns(rules, indexes[middle:], anchored)
+	return first + second, firstUncombined + secondUncombined
+
+
+class Rule(object):
+	__slots__ = ("name", "regex", "replacement")
+
+	def __init__(self, name, regex, replacement=None):
+		self.name = name
+		self.regex = regex
+		self.replacement = replacement
+
+
+def makeRules(items):
+	"""Compiles (name, pattern, replacement) tuples into rules, skipping any whose pattern is invalid."""
+	rules = []
+	for name, pattern, replacement in items:
+		try:
+			regex = re.compile(pattern)
+		except re.error:
+			log.warning("Invalid pattern in output rule %s: %s", name, pattern, exc_info=True)
+			continue
+		rules.append(Rule(name, regex, replacement))
+	return rules
+
+
+class Matcher(object):
+	"""Matches lines against many rules at once.
+	Rules whose patterns require a word are indexed by that word, and only the rules keyed by the words in a line are tried on it.
+	The patterns of the other rules are combined into alternations, so a line which none of them match is searched once rather than once for each rule.
+	Rules are always tried in the order they were given.
+	"""
+
+	def __init__(self, rules):
+		self.rules = list(rules)
+		# The indexes of the rules keyed by each word.
+		self._keyed = {}
+		# The indexes of the rules without a key word which must be tried on every line.
+		self._uncombined = []
+		anchored = []
+		unanchored = []
+		for index, rule in enumerate(self.rules):
+			word = getKeyWord(rule.regex)
+			if word is not None:
+				self._keyed.setdefault(word, []).append(index)
+			elif rule.regex.flags != DEFAULT_FLAGS or GROUP_REFERENCE_REGEX.search(rule.regex.pattern) is not None:
+				# Inline flags and group references would change the meaning of the other patterns in an alternation.
+				self._uncombined.append(index)
+			elif rule.regex.pattern.startswith("^"):
+				anchored.append(index)
+			else:
+				unanchored.append(index)
+		# Patterns which start with ^ are kept apart, since mixing them with the others would have every one of them tried at every position in a line.
+		self._alternations = []
+		for indexes, isAnchored in ((anchored, True), (unanchored, False)):
+			if indexes:
+				alternations, uncombined = combinePatterns(self.rules, indexes, isAnchored)
+				self._alternations.extend(alternations)
+				self._uncombined.extend(uncombined)
+		self._uncombined.sort()
+
+	def __len__(self):
+		return len(self.rules)
+
+	def _getCandidates(self, line):
+		"""Returns the indexes of the rules which may match line, in order."""
+		candidates = set(self._uncombined)
+		for regex, indexes in self._alternations:
+			if regex.search(line) is not None:
+				candidates.update(indexes)
+		for word in set(WORD_REGEX.findall(line)):
+			if word in self._keyed:
+				candidates.update(self._keyed[word])
+		return sorted(candidates)
+
+	def search(self, line):
+		"""Returns the first rule with a match anywhere in line, or None."""
+		for index in self._getCandidates(line):
+			rule = self.rules[index]
+			if rule.regex.search(line) is not None:
+				return rule
+		return None
+
+	def sub(self, line):
+		"""Replaces the matches of each rule in line with that rule's replacement, applying the rules in order."""
+		candidates = self._getCandidates(line)
+		i = 0
+		while i < len(candidates):
+			index = candidates[i]
+			rule = self.rules[index]
+			newLine = rule.regex.sub(rule.replacement, line)
+			if newLine != line:
+				line = newLine
+				# Later rules may match words which the replacement added.
+				candidates = [later for later in self._getCandidates(line) if later > index]
+				i = 0
+			else:
+				i += 1
+		return line
+
+
+class RuleEngine(object):
+	"""Gags and substitutes output lines, before they are spoken."""
+
+	def __init__(self, gags=(), substitutions=()):
+		self.gags = Matcher(gags)
+		self.substitutions = Matcher(substitutions)
+		# The number of lines gagged.
+		self.gaggedCount = 0
+
+	@classmethod
+	def fromConfig(cls, conf):
+		"""Builds the rules from the gags and substitutions sections of the add-on configuration.
+		Each gag is a name and a pattern, and each substitution is a name and a list of a pattern and a replacement.
+		"""
+		gags = makeRules((name, pattern, None) for name, pattern in conf["gags"].items())
+		substitutions = makeRules(
+			(name, pattern, replacement) for name, (pattern, replacement) in conf["substitutions"].items()
+		)
+		return cls(gags, substitutions)
+
+	def __bool__(self):
+		return bool(self.gags or self.substitutions)
+
+	__nonzero__ = __bool__
+
+	def apply(self, lines):
+		"""Returns the lines which aren't gagged, with any substitutions made.
+		Lines left blank by a substitution are dropped.
+		"""
+		result = []
+		for line in lines:
+			if self.gags and self.gags.search(line) is not None:
+				self.gaggedCount += 1
+				continue
+			if self.substitutions:
+				line = self.substitutions.sub(line)
+				if not line.strip():
+					continue
+			result.append(line)
+		return result
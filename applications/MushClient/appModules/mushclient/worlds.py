@@ -0,0 +1,83 @@
+﻿# -*- coding: utf-8 -*-
+# appModules/mushclient/worlds.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Scheduling of the speech of several MushClient worlds
+"""
+
+
+# Built-in Python Modules
+import time
+
+# Built-in NVDA Modules
+import core
+
+
+# The default seconds between the start of one background utterance and the next, used until the configuration is loaded.
+DEFAULT_BACKGROUND_INTERVAL = 3.0
+
+# The seconds a background world waits before trying again while the focused world is speaking.
+BUSY_RETRY_DELAY = 0.25
+
+
+class SpeechScheduler(object):
+	"""Decides when the output of each world may speak, on the main thread.
+	The focused world always speaks straight away.
+	Background worlds only speak while the focused world has nothing to say, and one background utterance starts at least interval seconds after the last.
+	A background world which has to wait is tried again once it might be allowed to speak, and its lines keep waiting in its flood control meanwhile.
+	"""
+
+	def __init__(self, interval, clock=time.time):
+		self.interval = interval
+		self.clock = clock
+		# The output of the focused world, or None if no world has focus.
+		self.focused = None
+		# The time the last background utterance started.
+		self._backgroundTime = None
+		# The outputs waiting to speak, oldest first.
+		self._waiting = []
+		self._isRetryScheduled = False
+		# The number of times a background world had to wait.
+		self.deferredCount = 0
+
+	def isFocused(self, output):
+		return output is self.focused
+
+	def mayDeliver(self, output):
+		"""Returns whether output may speak now.
+		If not, output is remembered, and its delivery is queued again later.
+		"""
+		if output is self.focused:
+			return True
+		now = self.clock()
+		if self.focused is not None and self.focused.isSpeaking:
+			delay = BUSY_RETRY_DELAY
+		elif self._backgroundTime is not None and now - self._backgroundTime < self.interval:
+			delay = self.interval - (now - self._backgroundTime)
+		else:
+			self._backgroundTime = now
+			return True
+		self.deferredCount += 1
+		if output not in self._waiting:
+			self._waiting.append(output)
+		if not self._isRetryScheduled:
+			self._isRetryScheduled = True
+			core.callLater(int(delay * 1000), self._retry)
+		return False
+
+	def forget(self, output):
+		"""Stops scheduling output, such as when its world is closed."""
+		if output is self.focused:
+			self.focused = None
+		if output in self._waiting:
+			self._waiting.remove(output)
+
+	def _retry(self):
+		self._isRetryScheduled = False
+		waiting = self._waiting
+		self._waiting = []
+		for output in waiting:
+			output._queueDelivery()
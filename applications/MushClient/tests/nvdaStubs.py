@@ -0,0 +1,233 @@
+﻿# -*- coding: utf-8 -*-
+# tests/nvdaStubs.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+"""Makes the MushClient app module's own modules importable outside of NVDA
+The NVDA modules they use are replaced by minimal stand-ins, which record what would have been spoken, played or queued.
+The MushClient package, and the JMC package which shares most of its modules, are registered without running their __init__, which needs the rest of NVDA.
+"""
+
+
+# Built-in Python Modules
+import logging
+import os
+import sys
+import threading
+import types
+
+
+APPLICATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir)
+PACKAGE_PATH = os.path.join(APPLICATIONS_PATH, "MushClient", "appModules", "mushclient")
+JMC_PACKAGE_PATH = os.path.join(APPLICATIONS_PATH, "JMC", "appModules", "jmc")
+
+
+def install(name, **attributes):
+	"""Returns the stand-in module with the given dotted name, adding it and its parents if needed, and sets attributes on it."""
+	module = sys.modules.get(name)
+	if module is None:
+		module = sys.modules[name] = types.ModuleType(name)
+		parentName, dot, childName = name.rpartition(".")
+		if parentName:
+			setattr(install(parentName), childName, module)
+	for key, value in attributes.items():
+		setattr(module, key, value)
+	return module
+
+
+def installPackage(name, path):
+	"""Registers the app module package in path under name, without running its __init__."""
+	return install(name, __path__=[path], __package__=name, __file__=os.path.join(path, "__init__.py"))
+
+
+def runPackageInit(name):
+	"""Runs the __init__ of a package registered by installPackage, and returns the package."""
+	module = sys.modules[name]
+	with open(module.__file__, "rb") as f:
+		code = compile(f.read(), module.__file__, "exec")
+	exec(code, vars(module))
+	return module
+
+
+log = logging.getLogger("mushclient")
+log.addHandler(logging.NullHandler())
+
+
+def initTranslation():
+	try:
+		import __builtin__ as builtins
+	except ImportError:
+		# Python3
+		import builtins
+	builtins._ = lambda text: text
+
+
+# Each item is a queued function and its arguments.
+queued = []
+
+
+def queueFunction(queue, func, *args, **kwargs):
+	queued.append((func, args, kwargs))
+
+
+def pumpQueue():
+	"""Runs the queued functions, including any they queue, as the main thread would."""
+	while queued:
+		func, args, kwargs = queued.pop(0)
+		func(*args, **kwargs)
+
+
+spoken = []
+
+
+class CallbackCommand(object):
+	def __init__(self, callback):
+		self.callback = callback
+
+
+def speak(sequence):
+	spoken.append(sequence)
+
+
+def speakText(text):
+	spoken.append([text])
+
+
+def cancelSpeech():
+	pass
+
+
+# Each item is a delay in milliseconds and the function to call after it.
+callLaterCalls = []
+
+
+def callLater(delay, func, *args, **kwargs):
+	callLaterCalls.append((delay, func))
+
+
+beeps = []
+waveFiles = []
+
+
+def beep(hz, length):
+	beeps.append((hz, length))
+
+
+def playWaveFile(fileName, asynchronous=True):
+	waveFiles.append(fileName)
+
+
+class LiveText(object):
+	STABILIZE_DELAY = 0
+
+	def initOverlayClass(self):
+		self._event = threading.Event()
+		self._monitorThread = None
+		self._keepMonitoring = False
+
+	def startMonitoring(self):
+		if self._monitorThread:
+			return
+		self._keepMonitoring = True
+		self._event.clear()
+		self._monitorThread = threading.Thread(target=self._monitor)
+		self._monitorThread.daemon = True
+		self._monitorThread.start()
+
+	def stopMonitoring(self):
+		if not self._monitorThread:
+			return
+		self._keepMonitoring = False
+		self._event.set()
+		self._monitorThread = None
+
+	def event_textChange(self):
+		self._event.set()
+
+	def _reportNewText(self, line):
+		speakText(line)
+
+
+class DisplayModelLiveText(LiveText):
+	def startMonitoring(self):
+		sys.modules["displayModel"].requestTextChangeNotifications(self, True)
+		super(DisplayModelLiveText, self).startMonitoring()
+
+	def stopMonitoring(self):
+		super(DisplayModelLiveText, self).stopMonitoring()
+		sys.modules["displayModel"].requestTextChangeNotifications(self, False)
+
+	def redraw(self):
+		pass
+
+
+class AppModule(object):
+	def __init__(self, *args, **kwargs):
+		pass
+
+	def terminate(self):
+		pass
+
+
+class IAccessible(object):
+	pass
+
+
+class ContentGenericClient(IAccessible):
+	pass
+
+
+class Window(object):
+	pass
+
+
+def makeOverlay(cls):
+	"""Returns an instance of an overlay class, initialised the way NVDA initialises overlay classes."""
+	obj = object.__new__(cls)
+	for base in reversed(cls.__mro__):
+		if "initOverlayClass" in vars(base):
+			base.initOverlayClass(obj)
+	return obj
+
+
+def reset():
+	"""Forgets everything recorded by the stand-ins."""
+	for items in (queued, spoken, callLaterCalls, beeps, waveFiles):
+		del items[:]
+	sys.modules["config"].conf["presentation"]["reportDynamicContentChanges"] = True
+
+
+install("addonHandler", initTranslation=initTranslation)
+install("api")
+install("appModuleHandler", AppModule=AppModule)
+install("config", conf={"presentation": {"reportDynamicContentChanges": True}})
+install("configobj", ConfigObj=object)
+install("configobj.validate", Validator=object)
+install("controlTypes", REASON_CARET="caret")
+install("core", callLater=callLater)
+install("displayModel", requestTextChangeNotifications=lambda obj, enable: None)
+install("globalCommands")
+install("logHandler", log=log)
+install("NVDAObjects.behaviors", LiveText=LiveText)
+install(
+	"NVDAObjects.IAccessible",
+	IAccessible=IAccessible,
+	ContentGenericClient=ContentGenericClient,
+	getNVDAObjectFromEvent=lambda hwnd, objectID, childID: None,
+)
+install("NVDAObjects.window", DisplayModelLiveText=DisplayModelLiveText, Window=Window)
+install("nvwave", playWaveFile=playWaveFile)
+install("oleacc", ROLE_SYSTEM_CLIENT=10, ROLE_SYSTEM_TEXT=42)
+install("queueHandler", eventQueue=object(), queueFunction=queueFunction)
+install("speech", speak=speak, speakText=speakText, cancelSpeech=cancelSpeech)
+install("speech.commands", CallbackCommand=CallbackCommand)
+install("textInfos", POSITION_ALL="all", UNIT_LINE="line")
+install("tones", beep=beep)
+install("ui")
+install("validate", Validator=object)
+install("windowUtils", WNDENUMPROC=lambda callback: callback)
+install("winUser", OBJID_CLIENT=-4)
+installPackage("mushclient", PACKAGE_PATH)
+installPackage("jmc", JMC_PACKAGE_PATH)
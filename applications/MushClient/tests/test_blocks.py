@@ -0,0 +1,66 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_blocks.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import re
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.blocks import BlockSuppressor
+from mushclient.flood import FloodControl
+
+
+ROOM = ["Town Square", "A busy square full of merchants.", "Exits: north south"]
+
+
+class TestBlockSuppressor(unittest.TestCase):
+	def setUp(self):
+		self.blocks = BlockSuppressor(3, 50, "{line}, seen", re.compile(r"^<\d+hp>"))
+
+	def test_repeatedRoomIsShortened(self):
+		self.assertEqual(self.blocks.apply(["> n", ""] + ROOM + ["<100hp>"]), ["> n", ""] + ROOM + ["<100hp>"])
+		self.assertEqual(self.blocks.apply(["<100hp>"] + ROOM + [""]), ["<100hp>", "Town Square, seen", ""])
+		self.assertEqual(self.blocks.suppressedCount, 1)
+
+	def test_repeatWithinAnUpdateIsKept(self):
+		lines = ROOM + [""] + ROOM
+		self.assertEqual(self.blocks.apply(lines), lines)
+
+	def test_identicalLinesAreKeptForFolding(self):
+		lines = ["You hit the orc."] * 6
+		self.assertEqual(self.blocks.apply(lines), lines)
+		self.assertEqual(self.blocks.apply(lines), lines)
+		floodControl = FloodControl(5.0)
+		floodControl.add(self.blocks.apply(lines))
+		self.assertEqual(floodControl.take()[0], [("You hit the orc.", 6)])
+
+	def test_alternatingCombatIsKept(self):
+		lines = ["You hit the orc.", "The orc misses you."] * 3
+		self.assertEqual(self.blocks.apply(lines), lines)
+
+	def test_shortBlocksAreKept(self):
+		lines = ["You hit the orc.", "The orc misses you."]
+		self.blocks.apply(lines)
+		self.assertEqual(self.blocks.apply(lines), lines)
+
+	def test_blockMustMatchWhole(self):
+		self.blocks.apply(ROOM)
+		lines = ROOM + ["A goblin is here."]
+		self.assertEqual(self.blocks.apply(lines), lines)
+
+	def test_leastRecentlyUsedBlockIsForgotten(self):
+		blocks = BlockSuppressor(3, 2)
+		rooms = [[name, "Description of {}.".format(name), "Exits: none"] for name in ("a", "b", "c")]
+		for room in rooms:
+			blocks.apply(room)
+		self.assertEqual(blocks.apply(rooms[0]), rooms[0])
+		self.assertEqual(blocks.apply(rooms[2]), ["c"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,92 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_delivery.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import random
+import threading
+import time
+from timeit import default_timer
+import unittest
+
+# Local Modules
+import nvdaStubs
+from test_output import OutputTestCase, waitFor
+
+
+# The seconds between output updates, and how long the output is updated for.
+UPDATE_INTERVAL = 0.02
+DURATION = 1.0
+
+# The seconds the simulated synthesizer takes to speak an utterance.
+SPEECH_TIME = 0.001
+
+
+class MainThread(threading.Thread):
+	"""Runs queued functions as NVDA's main thread would, and finishes each utterance once it has been spoken."""
+
+	def __init__(self):
+		super(MainThread, self).__init__()
+		self.daemon = True
+		self.keepRunning = True
+		# The seconds each queued function took.
+		self.times = []
+		self.spoken = []
+
+	def run(self):
+		while self.keepRunning or nvdaStubs.queued or nvdaStubs.spoken:
+			if nvdaStubs.queued:
+				func, args, kwargs = nvdaStubs.queued.pop(0)
+				start = default_timer()
+				func(*args, **kwargs)
+				self.times.append(default_timer() - start)
+			elif nvdaStubs.spoken:
+				text, callback = nvdaStubs.spoken.pop(0)
+				time.sleep(SPEECH_TIME)
+				self.spoken.append(text)
+				callback.callback()
+			else:
+				time.sleep(0.001)
+
+
+class TestDelivery(OutputTestCase):
+	def test_fiftyHertzOutput(self):
+		generator = random.Random(2)
+		log = ["line {} {}".format(i, "x" * generator.randint(10, 80)) for i in range(5000)]
+		output = self.output
+		self.resume()
+		mainThread = MainThread()
+		mainThread.start()
+		position = 0
+		isPaused = False
+		end = time.time() + DURATION
+		while time.time() < end:
+			position += generator.randint(1, 6)
+			output.screen = log[max(0, position - 60) : position]
+			output.event_textChange()
+			time.sleep(UPDATE_INTERVAL)
+			if not isPaused and time.time() > end - DURATION / 2:
+				# Lines which arrive while paused must be spoken once resumed.
+				isPaused = True
+				output.pause()
+				position += 5
+				output.screen = log[max(0, position - 60) : position]
+				output.event_textChange()
+				time.sleep(UPDATE_INTERVAL)
+				self.resume()
+		waitFor(lambda: output.lines == output.screen)
+		mainThread.keepRunning = False
+		mainThread.join(5.0)
+		spokenLines = "\n".join(mainThread.spoken).split("\n")
+		self.assertEqual(spokenLines, log[:position])
+		self.assertEqual(output.floodControl.droppedCount, 0)
+		# The main thread only formats and hands over text, so each delivery is short.
+		self.assertLess(max(mainThread.times), 0.05)
+		self.assertLessEqual(output.deliveryCount, len(mainThread.times))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,129 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_diff.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import difflib
+import random
+from timeit import default_timer
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.diff import getFailureTable, getNewLines, getOverlap, stripBlankLines
+
+
+# The benchmark scrolls a log through a screen of SCREEN_LINES lines, by MIN_SCROLL to MAX_SCROLL lines per snapshot.
+LOG_LINES = 20000
+SCREEN_LINES = 200
+MIN_SCROLL = 5
+MAX_SCROLL = 40
+
+
+class CollidingLine(str):
+	"""A line whose hash is the same as that of every other colliding line."""
+
+	def __hash__(self):
+		return 0
+
+
+def getNdiffNewLines(oldLines, newLines):
+	"""Returns the lines added to newLines, as found by the difflib.ndiff comparison LiveText used to do."""
+	return [line[2:] for line in difflib.ndiff(oldLines, newLines) if line.startswith("+ ") and line[2:].strip()]
+
+
+class TestFailureTable(unittest.TestCase):
+	def test_table(self):
+		self.assertEqual(getFailureTable(list("aabaaab")), [0, 1, 0, 1, 2, 2, 3])
+		self.assertEqual(getFailureTable(list("abcd")), [0, 0, 0, 0])
+		self.assertEqual(getFailureTable(list("aaaa")), [0, 1, 2, 3])
+		self.assertEqual(getFailureTable([]), [])
+
+
+class TestOverlap(unittest.TestCase):
+	def overlap(self, old, new):
+		return getOverlap(list(old), list(new), getFailureTable(list(new)))
+
+	def test_overlap(self):
+		self.assertEqual(self.overlap("abcde", "cdefg"), 3)
+		self.assertEqual(self.overlap("abc", "abc"), 3)
+		self.assertEqual(self.overlap("abc", "xyz"), 0)
+		self.assertEqual(self.overlap("abc", ""), 0)
+		self.assertEqual(self.overlap("", "abc"), 0)
+
+	def test_longestOverlapWins(self):
+		# Both "a" and "aba" end the old values and start the new ones.
+		self.assertEqual(self.overlap("xaba", "abab"), 3)
+
+	def test_matchMustEndTheOldValues(self):
+		self.assertEqual(self.overlap("abcx", "abcd"), 0)
+
+
+class TestNewLines(unittest.TestCase):
+	def test_scrollBySeveralLines(self):
+		self.assertEqual(getNewLines(["1", "2", "3", "4"], ["3", "4", "5", "6"]), ["5", "6"])
+		self.assertEqual(getNewLines(["1", "2", "3", "4"], ["4", "5", "6", "7"]), ["5", "6", "7"])
+
+	def test_growingScreen(self):
+		self.assertEqual(getNewLines(["1", "2"], ["1", "2", "3"]), ["3"])
+		self.assertEqual(getNewLines([], ["1"]), ["1"])
+
+	def test_noChange(self):
+		self.assertEqual(getNewLines(["1", "2", "3"], ["1", "2", "3"]), [])
+		self.assertEqual(getNewLines([], []), [])
+
+	def test_noOverlap(self):
+		self.assertEqual(getNewLines(["1", "2"], ["3", "4"]), ["3", "4"])
+
+	def test_completedPartialLine(self):
+		self.assertEqual(getNewLines(["1", "2", "> hel"], ["1", "2", "> hello", "3"]), ["> hello", "3"])
+		self.assertEqual(getNewLines(["1", "2", "> hel"], ["2", "> hello", "3"]), ["> hello", "3"])
+
+	def test_trailingBlankLines(self):
+		self.assertEqual(stripBlankLines(["1", " ", "2", "", "  "]), ["1", " ", "2"])
+		self.assertEqual(getNewLines(["1", "2", "", ""], ["1", "2", "3", ""]), ["3"])
+		self.assertEqual(getNewLines(["1", "2"], ["1", "2", "", " "]), [])
+		# A blank line between new lines is kept.
+		self.assertEqual(getNewLines(["1"], ["1", "", "2"]), ["", "2"])
+
+	def test_repeatedLines(self):
+		self.assertEqual(getNewLines(["a", "b", "a", "b"], ["a", "b", "a", "b", "a", "b"]), ["a", "b"])
+		self.assertEqual(getNewLines(["x", "x", "x"], ["x", "x", "x", "x"]), ["x"])
+
+	def test_hashCollisionIsNotAnOverlap(self):
+		old = [CollidingLine(line) for line in ("1", "2", "3")]
+		new = [CollidingLine(line) for line in ("4", "5", "6")]
+		self.assertEqual(getNewLines(old, new), ["4", "5", "6"])
+		new = [CollidingLine(line) for line in ("2", "3", "4")]
+		self.assertEqual(getNewLines(old, new), ["4"])
+
+
+class TestBenchmark(unittest.TestCase):
+	def test_fasterThanNdiff(self):
+		generator = random.Random(1)
+		words = ["the", "orc", "hits", "you", "north", "door", "says", "gold"]
+		log = [" ".join(generator.choice(words) for i in range(generator.randint(2, 12))) for i in range(LOG_LINES)]
+		snapshots = []
+		position = SCREEN_LINES
+		while position <= LOG_LINES:
+			snapshots.append(log[position - SCREEN_LINES : position])
+			position += generator.randint(MIN_SCROLL, MAX_SCROLL)
+		timings = {}
+		results = {}
+		for name, function in (("diff", getNewLines), ("ndiff", getNdiffNewLines)):
+			newLines = []
+			start = default_timer()
+			for oldLines, lines in zip(snapshots, snapshots[1:]):
+				newLines.extend(function(oldLines, lines))
+			timings[name] = default_timer() - start
+			results[name] = newLines
+		self.assertEqual(results["diff"], log[SCREEN_LINES : SCREEN_LINES + len(results["diff"])])
+		self.assertEqual(results["diff"], results["ndiff"])
+		self.assertLess(timings["diff"] * 2, timings["ndiff"])
+
+
+if __name__ == "__main__":
+	unittest.main()
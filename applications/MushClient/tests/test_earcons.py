@@ -0,0 +1,181 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_earcons.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from timeit import default_timer
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.earcons import Earcon, EarconPlayer, EarconTriggers, Trigger
+from test_output import OutputTestCase, getSpokenText, waitFor
+
+
+class FakePlayer(object):
+	def __init__(self):
+		self.played = []
+
+	def play(self, earcon):
+		self.played.append(earcon)
+
+
+class FakeConfig(dict):
+	def __init__(self, path, earcons):
+		super(FakeConfig, self).__init__(earcons=earcons)
+		self.path = path
+
+
+class TestEarcon(unittest.TestCase):
+	def test_parseTone(self):
+		earcon = Earcon.parse("880:60", "")
+		self.assertEqual((earcon.frequency, earcon.duration, earcon.path), (880.0, 60, None))
+
+	def test_parseToneWithoutDuration(self):
+		self.assertIsNotNone(Earcon.parse("440", "").frequency)
+
+	def test_parseWaveFile(self):
+		earcon = Earcon.parse("sounds/tell.wav", "addon")
+		self.assertEqual(earcon.path, os.path.join("addon", "sounds/tell.wav"))
+
+
+class TestEarconTriggers(unittest.TestCase):
+	def setUp(self):
+		self.player = FakePlayer()
+		self.tell = Earcon(880.0)
+		self.hit = Earcon(440.0)
+		self.triggers = EarconTriggers(
+			[
+				Trigger("tell", re.compile(r"^\w+ tells you"), self.tell),
+				Trigger("hit", re.compile(r"^The \w+ hits you"), self.hit, gag=True),
+			],
+			player=self.player,
+		)
+
+	def test_matchedLinesPlayTheirEarcon(self):
+		lines = ["Bob tells you 'hi'", "You rest."]
+		self.assertEqual(self.triggers.apply(lines), lines)
+		self.assertEqual(self.player.played, [self.tell])
+
+	def test_gaggedLinesAreRemoved(self):
+		self.assertEqual(self.triggers.apply(["The orc hits you.", "You flee."]), ["You flee."])
+		self.assertEqual(self.player.played, [self.hit])
+
+	def test_eachEarconPlaysOncePerUpdate(self):
+		self.triggers.apply(["The orc hits you."] * 20 + ["Bob tells you 'run'"])
+		self.assertEqual(self.player.played, [self.hit, self.tell])
+		self.assertEqual(self.triggers.triggeredCount, 21)
+
+	def test_fromConfig(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+		open(os.path.join(directory, "tell.wav"), "wb").close()
+		conf = FakeConfig(
+			os.path.join(directory, "config.ini"),
+			{
+				"tell": ["tells you", "tell.wav"],
+				"hit": ["hits you", "440:30", "gag"],
+				"invalid": ["(", "440"],
+				"missing": ["x", "missing.wav"],
+			},
+		)
+		triggers = EarconTriggers.fromConfig(conf)
+		byName = dict((trigger.name, trigger) for trigger in triggers.matcher.rules)
+		self.assertEqual(sorted(byName), ["hit", "tell"])
+		self.assertTrue(byName["hit"].gag)
+		self.assertFalse(byName["tell"].gag)
+		self.assertEqual(byName["tell"].earcon.path, os.path.join(directory, "tell.wav"))
+
+
+class TestEarconPlayer(unittest.TestCase):
+	def test_playsOnItsOwnThread(self):
+		player = EarconPlayer()
+		self.addCleanup(player.stop)
+		threads = []
+		earcon = Earcon(440.0, 10)
+		original = Earcon.play
+		try:
+			Earcon.play = lambda self: threads.append(threading.current_thread())
+			player.play(earcon)
+			waitFor(lambda: player.playedCount == 1)
+		finally:
+			Earcon.play = original
+		self.assertIsNot(threads[0], threading.current_thread())
+
+	def test_neverBlocks(self):
+		player = EarconPlayer(maxPending=2)
+		self.addCleanup(player.stop)
+		release = threading.Event()
+		original = Earcon.play
+		try:
+			Earcon.play = lambda self: release.wait(2.0)
+			for i in range(10):
+				player.play(Earcon(440.0))
+			self.assertGreaterEqual(player.droppedCount, 7)
+		finally:
+			release.set()
+			Earcon.play = original
+
+	def test_dispatchesTonesAndWaveFiles(self):
+		player = EarconPlayer()
+		self.addCleanup(player.stop)
+		player.play(Earcon(880.0, 60))
+		player.play(Earcon(path="tell.wav"))
+		waitFor(lambda: player.playedCount == 2)
+		self.assertEqual(nvdaStubs.beeps[-1], (880.0, 60))
+		self.assertEqual(nvdaStubs.waveFiles[-1], "tell.wav")
+
+	def test_tonesDoNotOverlap(self):
+		player = EarconPlayer()
+		self.addCleanup(player.stop)
+		tell = Earcon(880.0, 60)
+		hit = Earcon(440.0, 30)
+		triggers = EarconTriggers(
+			[Trigger("tell", re.compile("tells you"), tell), Trigger("hit", re.compile("hits you"), hit)], player=player
+		)
+		# The time each beep started, and its duration in seconds.
+		started = []
+		tones = sys.modules["tones"]
+		original = tones.beep
+		try:
+			tones.beep = lambda hz, length: started.append((default_timer(), length / 1000.0))
+			triggers.apply(["Bob tells you 'hi'", "The orc hits you."])
+			waitFor(lambda: player.playedCount == 2)
+		finally:
+			tones.beep = original
+		(firstStart, firstDuration), (secondStart, secondDuration) = started
+		self.assertGreaterEqual(secondStart - firstStart, firstDuration)
+
+
+class TestOutputEarcons(OutputTestCase):
+	def setUp(self):
+		super(TestOutputEarcons, self).setUp()
+		self.player = FakePlayer()
+		self.output.earcons = EarconTriggers(
+			[Trigger("tell", re.compile("tells you"), Earcon(880.0), gag=True)], player=self.player
+		)
+		self.resume()
+
+	def test_earconsPlayWithoutDynamicContentChanges(self):
+		sys.modules["config"].conf["presentation"]["reportDynamicContentChanges"] = False
+		self.show(["Bob tells you 'hi'"])
+		self.assertEqual(len(self.player.played), 1)
+		self.assertEqual(getSpokenText(), [])
+
+	def test_gaggedLineIsNotSpoken(self):
+		self.show(["Bob tells you 'hi'", "You rest."])
+		self.assertEqual(len(self.player.played), 1)
+		self.assertEqual(getSpokenText(), ["You rest."])
+
+
+if __name__ == "__main__":
+	unittest.main()
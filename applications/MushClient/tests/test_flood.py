@@ -0,0 +1,130 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_flood.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.flood import FloodControl
+from mushclient.output import Output
+
+
+MAX_AGE = 5.0
+
+
+class Clock(object):
+	"""A clock which only moves when told to."""
+
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+class TestFloodControl(unittest.TestCase):
+	def setUp(self):
+		self.clock = Clock()
+		self.flood = FloodControl(MAX_AGE, clock=self.clock)
+
+	def test_duplicatesAreFolded(self):
+		self.flood.add(["a", "a", "b", "a"])
+		self.flood.add(["a"])
+		self.assertEqual(len(self.flood), 3)
+		self.assertEqual(self.flood.take(), ([("a", 2), ("b", 1), ("a", 2)], 0))
+		self.assertEqual(self.flood.foldedCount, 2)
+		self.assertEqual(len(self.flood), 0)
+
+	def test_duplicatesAreKeptWhenNotFolding(self):
+		self.flood.foldDuplicates = False
+		self.flood.add(["a", "a"])
+		self.assertEqual(self.flood.take(), ([("a", 1), ("a", 1)], 0))
+		self.assertEqual(self.flood.foldedCount, 0)
+
+	def test_oldLinesAreKeptUnlessBehind(self):
+		self.flood.add(["a"])
+		self.clock.now = 100.0
+		self.assertEqual(self.flood.take(), ([("a", 1)], 0))
+		self.assertEqual(self.flood.droppedCount, 0)
+
+	def test_oldLinesAreDroppedWhenBehind(self):
+		self.flood.add(["a", "b"])
+		self.clock.now = 2.0
+		self.flood.add(["c"])
+		self.clock.now = 6.0
+		# Lines are only dropped once they have waited longer than the maximum age.
+		self.flood.add(["d"])
+		self.clock.now = 7.0
+		self.assertEqual(self.flood.take(isBehind=True), ([("c", 1), ("d", 1)], 2))
+		self.assertEqual(self.flood.droppedCount, 2)
+
+	def test_foldedLinesCountWhenDropped(self):
+		self.flood.add(["a", "a", "a", "b"])
+		self.clock.now = 10.0
+		self.flood.add(["c"])
+		self.assertEqual(self.flood.take(isBehind=True), ([("c", 1)], 4))
+		self.flood.add(["d", "d"])
+		self.clock.now = 20.0
+		self.assertEqual(self.flood.take(isBehind=True), ([], 2))
+		self.assertEqual(self.flood.droppedCount, 6)
+
+	def test_repeatedLineIsKeptWhileItKeepsArriving(self):
+		self.flood.add(["a"])
+		self.clock.now = 10.0
+		# The folded line last arrived just now.
+		self.flood.add(["a"])
+		self.assertEqual(self.flood.take(isBehind=True), ([("a", 2)], 0))
+
+
+class TestSkippedLinesSpeech(unittest.TestCase):
+	def setUp(self):
+		nvdaStubs.reset()
+		self.clock = Clock()
+		self.output = nvdaStubs.makeOverlay(Output)
+		self.output.floodControl = FloodControl(MAX_AGE, clock=self.clock)
+
+	def deliver(self, lines):
+		self.output._queueSpeech(lines)
+		nvdaStubs.pumpQueue()
+
+	def getSpokenText(self):
+		return [sequence[0] for sequence in nvdaStubs.spoken]
+
+	def test_linesSkippedWhileBehindAreCounted(self):
+		self.deliver(["one"])
+		self.clock.now = 1.0
+		# The first utterance is still being spoken, so these lines wait.
+		self.deliver(["two", "three"])
+		self.assertEqual(self.getSpokenText(), ["one"])
+		self.clock.now = 7.0
+		self.output.floodControl.add(["four", "four"])
+		nvdaStubs.spoken[-1][-1].callback()
+		nvdaStubs.pumpQueue()
+		self.assertEqual(self.getSpokenText(), ["one", "2 lines skipped.\nfour, times 2"])
+		self.assertEqual(self.output.floodControl.droppedCount, 2)
+
+	def test_nothingIsSkippedWhenNotBehind(self):
+		self.deliver(["one"])
+		nvdaStubs.spoken[-1][-1].callback()
+		nvdaStubs.pumpQueue()
+		self.clock.now = 100.0
+		self.deliver(["two"])
+		self.assertEqual(self.getSpokenText(), ["one", "two"])
+
+	def test_onlySkippedLines(self):
+		self.deliver(["one"])
+		self.clock.now = 1.0
+		self.deliver(["two"])
+		self.clock.now = 7.0
+		nvdaStubs.spoken[-1][-1].callback()
+		nvdaStubs.pumpQueue()
+		self.assertEqual(self.getSpokenText(), ["one", "1 lines skipped."])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,182 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_jmc.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import os
+import sys
+import unittest
+
+# Local Modules
+import nvdaStubs
+jmc = nvdaStubs.runPackageInit("jmc")
+
+
+# Window classes used by the fake windows.
+PREFERRED_CLASS, FALLBACK_CLASS = jmc.OUTPUT_CLASS_NAMES
+OUTPUT_CONTROL_ID = 59648
+
+
+def toJMC(line):
+	"""Returns a line of a MushClient module as it is copied into the JMC add-on."""
+	line = line.replace(b"# appModules/mushclient", b"#appModules/jmc", 1)
+	return line.replace(b"MushClient", b"JMC").replace(b"2018", b"2020", 1)
+
+
+class TestCopies(unittest.TestCase):
+	def test_sharedModulesMatch(self):
+		names = sorted(name for name in os.listdir(nvdaStubs.JMC_PACKAGE_PATH) if name.endswith(".py") and name != "__init__.py")
+		self.assertIn("output.py", names)
+		for name in names:
+			with open(os.path.join(nvdaStubs.PACKAGE_PATH, name), "rb") as f:
+				expected = [toJMC(line) for line in f.read().split(b"\n")]
+			with open(os.path.join(nvdaStubs.JMC_PACKAGE_PATH, name), "rb") as f:
+				actual = f.read().split(b"\n")
+			self.assertEqual(actual, expected, "{} differs from the MushClient copy".format(name))
+
+
+class FakeUser32(object):
+	"""Enumerates fake child windows, each a tuple of a handle, class name, visibility and control ID."""
+
+	def __init__(self, windows):
+		self.windows = windows
+		# The handles passed to the callback, in order.
+		self.visited = []
+
+	def EnumChildWindows(self, parent, callback, data):
+		for window in self.windows:
+			self.visited.append(window[0])
+			if not callback(window[0], data):
+				break
+
+
+class FakeCtypes(object):
+	def __init__(self, user32):
+		self.windll = type("windll", (object,), {"user32": user32})
+
+
+class WindowsTestCase(unittest.TestCase):
+	def setUp(self):
+		self.originalCtypes = jmc.ctypes
+		self.existing = set()
+		self.setWindows([])
+		winUser = sys.modules["winUser"]
+		winUser.isWindowVisible = lambda hwnd: self.getWindow(hwnd)[2]
+		winUser.getControlID = lambda hwnd: self.getWindow(hwnd)[3]
+		winUser.getClassName = lambda hwnd: self.getWindow(hwnd)[1]
+		winUser.isWindow = lambda hwnd: hwnd in self.existing
+
+	def tearDown(self):
+		jmc.ctypes = self.originalCtypes
+
+	def setWindows(self, windows):
+		self.user32 = FakeUser32(windows)
+		jmc.ctypes = FakeCtypes(self.user32)
+		self.existing.update(window[0] for window in windows)
+
+	def getWindow(self, hwnd):
+		return next(window for window in self.user32.windows if window[0] == hwnd)
+
+
+class TestFindDescendantWindow(WindowsTestCase):
+	def find(self, **kwargs):
+		return jmc.findDescendantWindow(1, jmc.OUTPUT_CLASS_NAMES, **kwargs)
+
+	def test_enumerationStopsAtPreferredClass(self):
+		self.setWindows([(2, "Edit", True, 1000), (3, PREFERRED_CLASS, True, OUTPUT_CONTROL_ID), (4, FALLBACK_CLASS, True, OUTPUT_CONTROL_ID)])
+		self.assertEqual(self.find(), 3)
+		self.assertEqual(self.user32.visited, [2, 3])
+
+	def test_preferredClassWinsOverEarlierFallback(self):
+		self.setWindows([(2, FALLBACK_CLASS, True, OUTPUT_CONTROL_ID), (3, PREFERRED_CLASS, True, OUTPUT_CONTROL_ID)])
+		self.assertEqual(self.find(), 3)
+
+	def test_fallbackClass(self):
+		self.setWindows([(2, "Edit", True, 1000), (3, FALLBACK_CLASS, True, OUTPUT_CONTROL_ID)])
+		self.assertEqual(self.find(), 3)
+		self.assertEqual(self.user32.visited, [2, 3])
+
+	def test_visibilityAndControlID(self):
+		self.setWindows([
+			(2, PREFERRED_CLASS, False, OUTPUT_CONTROL_ID),
+			(3, PREFERRED_CLASS, True, 1),
+			(4, PREFERRED_CLASS, True, OUTPUT_CONTROL_ID),
+		])
+		self.assertEqual(self.find(visible=True, controlID=OUTPUT_CONTROL_ID), 4)
+		self.assertEqual(self.find(visible=False), 2)
+		self.assertEqual(self.find(controlID=1), 3)
+
+	def test_noMatchRaisesLookupError(self):
+		self.setWindows([(2, "Edit", True, 1000)])
+		self.assertRaises(LookupError, self.find)
+
+
+class TestGetOutput(WindowsTestCase):
+	def setUp(self):
+		super(TestGetOutput, self).setUp()
+		nvdaStubs.reset()
+		sys.modules["addonHandler"].getCodeAddon = lambda: type("Addon", (object,), {"path": "addon"})
+		self.appModule = jmc.AppModule()
+		self.outputs = {}
+		self.originalGetNVDAObjectFromEvent = jmc.getNVDAObjectFromEvent
+		jmc.getNVDAObjectFromEvent = self.getNVDAObjectFromEvent
+		self.setWindows([(2, PREFERRED_CLASS, True, OUTPUT_CONTROL_ID)])
+		self.existing.add(1)
+
+	def tearDown(self):
+		for output in self.outputs.values():
+			output.stopMonitoring()
+		jmc.getNVDAObjectFromEvent = self.originalGetNVDAObjectFromEvent
+		super(TestGetOutput, self).tearDown()
+
+	def getNVDAObjectFromEvent(self, hwnd, objectID, childID):
+		if hwnd not in self.outputs:
+			self.outputs[hwnd] = nvdaStubs.makeOverlay(jmc.Output)
+		return self.outputs[hwnd]
+
+	def test_outputIsCached(self):
+		output = self.appModule.getOutput(1)
+		self.assertIsInstance(output, jmc.Output)
+		self.assertIs(self.appModule.getOutput(1), output)
+		self.assertIs(self.appModule.getOutput(1), output)
+		# The windows were only enumerated once.
+		self.assertEqual(self.user32.visited, [2])
+		self.assertEqual((self.appModule.outputCacheHits, self.appModule.outputCacheMisses), (2, 1))
+
+	def test_destroyedOutputIsFoundAgain(self):
+		output = self.appModule.getOutput(1)
+		output.resume()
+		self.existing.discard(2)
+		self.setWindows([(3, PREFERRED_CLASS, True, OUTPUT_CONTROL_ID)])
+		newOutput = self.appModule.getOutput(1)
+		self.assertIsNot(newOutput, output)
+		self.assertFalse(output.isMonitoring)
+		self.assertEqual(self.appModule.outputCache, {1: (3, newOutput)})
+
+	def test_missingOutputIsNotCached(self):
+		self.setWindows([(2, "Edit", True, 1000)])
+		self.assertIsNone(self.appModule.getOutput(1))
+		self.assertEqual(self.appModule.outputCache, {})
+
+	def test_objectWhichIsNotAnOutputIsNotCached(self):
+		self.outputs[2] = object()
+		self.assertIsNone(self.appModule.getOutput(1))
+		self.assertEqual(self.appModule.outputCache, {})
+		del self.outputs[2]
+
+	def test_closedForegroundWindowIsForgotten(self):
+		output = self.appModule.getOutput(1)
+		output.resume()
+		self.existing.discard(1)
+		handled = []
+		self.appModule.event_foreground(None, lambda: handled.append(True))
+		self.assertEqual(handled, [True])
+		self.assertEqual(self.appModule.outputCache, {})
+		self.assertFalse(output.isMonitoring)
+
+
+if __name__ == "__main__":
+	unittest.main()
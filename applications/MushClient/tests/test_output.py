@@ -0,0 +1,111 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_output.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import time
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.output import Output
+
+
+class FakeTextInfo(object):
+	def __init__(self, lines):
+		self.lines = lines
+
+	def getTextInChunks(self, unit):
+		return iter(self.lines)
+
+
+class FakeOutput(Output):
+	"""An output whose text is a list of lines set by the test."""
+
+	def makeTextInfo(self, position):
+		return FakeTextInfo(list(self.screen))
+
+
+def waitFor(predicate, timeout=2.0):
+	end = time.time() + timeout
+	while not predicate():
+		if time.time() > end:
+			raise AssertionError("Timed out waiting for the monitor thread")
+		time.sleep(0.001)
+
+
+def getSpokenText():
+	return [sequence[0] for sequence in nvdaStubs.spoken]
+
+
+class OutputTestCase(unittest.TestCase):
+	def setUp(self):
+		nvdaStubs.reset()
+		self.output = nvdaStubs.makeOverlay(FakeOutput)
+		self.output.screen = []
+
+	def tearDown(self):
+		self.output.stopMonitoring()
+
+	def resume(self):
+		"""Resumes the output, and waits for the monitor thread to read the lines which changes are compared with."""
+		self.output.resume()
+		self.assertTrue(self.output.baselineRead.wait(2.0))
+
+	def show(self, lines):
+		"""Changes the text of the output, and waits for the monitor thread to read it."""
+		self.output.screen = list(lines)
+		self.output.event_textChange()
+		waitFor(lambda: self.output.lines == self.output.screen)
+		nvdaStubs.pumpQueue()
+
+
+class TestMonitor(OutputTestCase):
+	def test_linesAreReadThroughTextInfo(self):
+		self.output.screen = ["one", "two"]
+		self.resume()
+		waitFor(lambda: self.output.lines == ["one", "two"])
+		self.assertEqual(self.output.getBottomLine(), "two")
+
+	def test_newLinesAreSpoken(self):
+		self.output.screen = ["one", "two"]
+		self.resume()
+		self.show(["one", "two", "three", "four"])
+		self.assertEqual(getSpokenText(), ["three\nfour"])
+		self.assertEqual(self.output.scrollback.getNewest(2), ["three", "four"])
+
+	def test_stabilizeDelay(self):
+		self.output.STABILIZE_DELAY = 0.01
+		self.resume()
+		self.show(["one"])
+		self.assertEqual(getSpokenText(), ["one"])
+
+	def test_changesWhilePausedAreSpokenOnResume(self):
+		self.resume()
+		self.show(["one"])
+		# The synthesizer finished speaking the first line.
+		nvdaStubs.spoken[-1][-1].callback()
+		self.output.pause()
+		self.output.screen = ["one", "two", "three"]
+		self.output.event_textChange()
+		time.sleep(0.05)
+		self.assertEqual(self.output.lines, ["one"])
+		self.resume()
+		waitFor(lambda: self.output.lines == self.output.screen)
+		nvdaStubs.pumpQueue()
+		self.assertEqual(getSpokenText(), ["one", "two\nthree"])
+
+	def test_stopWhilePaused(self):
+		self.resume()
+		self.output.pause()
+		self.output.stopMonitoring()
+		self.assertFalse(self.output.isMonitoring)
+		# Monitoring again reads a new baseline.
+		self.assertFalse(self.output.baselineRead.is_set())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,59 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_prompt.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import sys
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.prompt import PromptTracker
+from test_output import OutputTestCase, getSpokenText
+
+
+PATTERN = r"<(?P<hp>\d+)hp (?P<mv>\d+)mv>"
+
+
+class TestPromptTracker(unittest.TestCase):
+	def test_onlyChangedFieldsAreReported(self):
+		prompt = PromptTracker(PATTERN)
+		self.assertEqual(prompt.apply(["<100hp 200mv>"]), ["hp 100, mv 200"])
+		self.assertEqual(prompt.apply(["<100hp 200mv>"]), [])
+		self.assertEqual(prompt.apply(["<95hp 200mv> You flee."]), ["hp 95", "You flee."])
+
+	def test_threshold(self):
+		prompt = PromptTracker(PATTERN, {"hp": 10.0})
+		prompt.apply(["<100hp 200mv>"])
+		self.assertEqual(prompt.apply(["<95hp 200mv>"]), [])
+		self.assertEqual(prompt.apply(["<89hp 200mv>"]), ["hp 89"])
+
+	def test_onlyChanges(self):
+		prompt = PromptTracker(PATTERN)
+		lines = ["You hit the orc.", "<100hp 200mv> The orc flees."]
+		self.assertEqual(prompt.apply(lines, onlyChanges=True), ["hp 100, mv 200"])
+
+
+class TestPromptSpeech(OutputTestCase):
+	def setUp(self):
+		super(TestPromptSpeech, self).setUp()
+		self.resume()
+		self.output.prompt = PromptTracker(PATTERN)
+		sys.modules["config"].conf["presentation"]["reportDynamicContentChanges"] = False
+
+	def test_promptChangesSpokenWithoutDynamicContentChanges(self):
+		self.show(["You hit the orc.", "<100hp 200mv>"])
+		self.assertEqual(getSpokenText(), ["hp 100, mv 200"])
+		self.assertEqual(self.output.scrollback.getNewest(2), ["You hit the orc.", "<100hp 200mv>"])
+
+	def test_alwaysSpeakOff(self):
+		self.output.prompt.alwaysSpeak = False
+		self.show(["You hit the orc.", "<100hp 200mv>"])
+		self.assertEqual(getSpokenText(), [])
+
+
+if __name__ == "__main__":
+	unittest.main()
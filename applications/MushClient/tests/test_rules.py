@@ -0,0 +1,203 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_rules.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import random
+import re
+from timeit import default_timer
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.rules import Matcher, RuleEngine, getKeyWord, getRequiredRuns, makeRules
+
+
+# The numbers of rules the benchmark is run with, and the number of lines matched against them.
+BENCHMARK_RULE_COUNTS = (100, 1000, 5000)
+BENCHMARK_LINES = 500
+
+# Each timing is the best of this many runs, so other threads don't skew it.
+BENCHMARK_RUNS = 3
+
+# Patterns without a key word, such as those which start or end with a word, each with a line it matches.
+BENCHMARK_PATTERNS = (
+	("^{} hits", "{} hits the orc"),
+	("tells {}", "Bob tells {} hello"),
+	("^{}:", "{}: hello"),
+	(r"{}\b", "the {} waves"),
+)
+
+
+def timeSearches(search, lines):
+	"""Returns the result of search for each line, and the fastest time taken to search them all."""
+	timings = []
+	for i in range(BENCHMARK_RUNS):
+		start = default_timer()
+		results = [search(line) for line in lines]
+		timings.append(default_timer() - start)
+	return results, min(timings)
+
+
+def searchEach(rules, line):
+	"""Returns the first rule with a match in line, trying every rule in turn."""
+	for rule in rules:
+		if rule.regex.search(line) is not None:
+			return rule
+	return None
+
+
+class TestRequiredRuns(unittest.TestCase):
+	def test_literal(self):
+		self.assertEqual(getRequiredRuns("^You hit"), ["You hit"])
+		self.assertEqual(getRequiredRuns("a.b$"), ["a", "b"])
+
+	def test_escapes(self):
+		self.assertEqual(getRequiredRuns(r"a\.b\d c"), ["a.b", " c"])
+		self.assertEqual(getRequiredRuns(r"\(x\)"), ["(x)"])
+
+	def test_characterClasses(self):
+		self.assertEqual(getRequiredRuns("ab[]x]cd"), ["ab", "cd"])
+		self.assertEqual(getRequiredRuns(r"x[^\]]y"), ["x", "y"])
+
+	def test_groups(self):
+		self.assertEqual(getRequiredRuns("foo (bar|baz) qux"), ["foo ", " qux"])
+		self.assertEqual(getRequiredRuns("a(?:b(c))d"), ["a", "d"])
+
+	def test_quantifiers(self):
+		# The character before *, ? or {} may be missing, but + requires it.
+		self.assertEqual(getRequiredRuns("abc* de+f{2,3}g?h"), ["ab", " de", "h"])
+
+	def test_topLevelAlternatives(self):
+		self.assertEqual(getRequiredRuns("the orc|the troll"), [])
+
+
+class TestKeyWord(unittest.TestCase):
+	def keyWord(self, pattern, flags=0):
+		return getKeyWord(re.compile(pattern, flags))
+
+	def test_longestInnerWord(self):
+		self.assertEqual(self.keyWord("the orc hits you"), "hits")
+		self.assertEqual(self.keyWord(r"You\.hit\.hard"), "hit")
+
+	def test_wordsAtTheEdgesAreNotKeys(self):
+		self.assertIsNone(self.keyWord("^You hit"))
+		self.assertIsNone(self.keyWord("tells you"))
+		self.assertIsNone(self.keyWord(r"^\w+ says"))
+
+	def test_wordsInClassesAndGroupsAreNotKeys(self):
+		self.assertIsNone(self.keyWord("a [orc] b"))
+		self.assertIsNone(self.keyWord("a (orc) b"))
+		self.assertEqual(self.keyWord("a (orc) hits (you)"), "hits")
+
+	def test_quantifiedWordsAreNotKeys(self):
+		self.assertEqual(self.keyWord("a bigger orc b"), "bigger")
+		self.assertEqual(self.keyWord("a bigg?er orc b"), "orc")
+
+	def test_alternativesHaveNoKey(self):
+		self.assertIsNone(self.keyWord("a orc b|a troll b"))
+
+	def test_flagsHaveNoKey(self):
+		self.assertIsNone(self.keyWord("(?i)the orc hits you"))
+		self.assertIsNone(self.keyWord("the orc hits you", re.IGNORECASE))
+
+
+class TestMatcher(unittest.TestCase):
+	def matcher(self, *items):
+		return Matcher(makeRules(items))
+
+	def test_searchReturnsTheFirstRuleInOrder(self):
+		matcher = self.matcher(("tell", "tells you", None), ("hit", "the orc hits you", None))
+		self.assertEqual(matcher.search("Bob tells you the orc hits you").name, "tell")
+		self.assertEqual(matcher.search("the orc hits you").name, "hit")
+		self.assertIsNone(matcher.search("the orc misses you"))
+		matcher = self.matcher(("hit", "the orc hits you", None), ("tell", "tells you", None))
+		self.assertEqual(matcher.search("Bob tells you the orc hits you").name, "hit")
+
+	def test_earlierRuleMatchingLaterInTheLine(self):
+		# Bob matches first in the line, but the dragon rule comes first.
+		matcher = self.matcher(("dragon", "dragon", None), ("bob", "^Bob", None), ("sees", "sees", None))
+		self.assertEqual(matcher.search("Bob sees a dragon").name, "dragon")
+		self.assertEqual(matcher.search("Bob sees a cat").name, "bob")
+
+	def test_rulesWhichCannotBeCombined(self):
+		matcher = self.matcher(
+			("flags", "(?i)^you hit", None),
+			("reference", r"(\w+) \1", None),
+			("name", r"(?P<who>\w+) says", None),
+			("sameName", r"(?P<who>\w+) shouts", None),
+			("plain", "^(Bob|Alice)", None),
+		)
+		self.assertEqual(matcher.search("YOU HIT the orc").name, "flags")
+		self.assertEqual(matcher.search("go go").name, "reference")
+		self.assertEqual(matcher.search("Bob shouts").name, "sameName")
+		self.assertEqual(matcher.search("Bob says").name, "name")
+		self.assertEqual(matcher.search("Alice").name, "plain")
+		self.assertIsNone(matcher.search("nothing here"))
+
+	def test_manyGroups(self):
+		# Python 2 can't compile more than 100 groups into one pattern.
+		matcher = self.matcher(*[("rule{}".format(i), "^(Name{}) hits".format(i), None) for i in range(300)])
+		self.assertEqual(matcher.search("Name299 hits").name, "rule299")
+		self.assertEqual(matcher.search("Name3 hits").name, "rule3")
+		self.assertIsNone(matcher.search("Name300 hits"))
+
+	def test_subAppliesRulesInOrder(self):
+		matcher = self.matcher(("foo", "foo", "bar"), ("bar", "bar", "baz"))
+		self.assertEqual(matcher.sub("foo"), "baz")
+		# An earlier rule isn't applied to a later rule's replacement.
+		matcher = self.matcher(("bar", "bar", "baz"), ("foo", "foo", "bar"))
+		self.assertEqual(matcher.sub("foo"), "bar")
+		matcher = self.matcher(("name", r"^(\w+) says", r"\1:"), ("hit", "the orc hits you", "ouch"))
+		self.assertEqual(matcher.sub("Bob says the orc hits you"), "Bob: ouch")
+		self.assertEqual(matcher.sub("nothing"), "nothing")
+
+
+class TestRuleEngine(unittest.TestCase):
+	def setUp(self):
+		self.engine = RuleEngine(
+			makeRules([("spam", "^You hear", None), ("hunger", "are hungry", None)]),
+			makeRules([("hp", r"HP:(\d+)", r"health \1"), ("prompt", r"^> ?$", "")]),
+		)
+
+	def test_apply(self):
+		lines = ["You hear a bird.", "HP:50 > go north", "You are hungry.", ">", "Bob waves."]
+		self.assertEqual(self.engine.apply(lines), ["health 50 > go north", "Bob waves."])
+		self.assertEqual(self.engine.gaggedCount, 2)
+
+	def test_gagsComeBeforeSubstitutions(self):
+		engine = RuleEngine(makeRules([("hp", "HP", None)]), makeRules([("hp", "HP", "health")]))
+		self.assertEqual(engine.apply(["HP:50", "ok"]), ["ok"])
+
+	def test_emptyEngine(self):
+		engine = RuleEngine()
+		self.assertFalse(engine)
+		self.assertTrue(self.engine)
+		self.assertEqual(engine.apply(["a", " "]), ["a", " "])
+
+
+class TestBenchmark(unittest.TestCase):
+	def test_fasterThanSearchingEachRule(self):
+		generator = random.Random(3)
+		words = ["the", "orc", "hits", "you", "tells", "says", "Bob", "Name", "north", "door"]
+		for count in BENCHMARK_RULE_COUNTS:
+			patterns = [generator.choice(BENCHMARK_PATTERNS) for i in range(count)]
+			rules = makeRules(("Name{}".format(i), pattern.format("Name{}".format(i)), None) for i, (pattern, line) in enumerate(patterns))
+			lines = [" ".join(generator.choice(words) for i in range(generator.randint(2, 12))) for i in range(BENCHMARK_LINES)]
+			# A few lines match a rule.
+			for i in range(0, BENCHMARK_LINES, 20):
+				index = generator.randrange(count)
+				lines[i] = patterns[index][1].format("Name{}".format(index))
+			matcher = Matcher(rules)
+			found, matcherTime = timeSearches(matcher.search, lines)
+			expected, eachTime = timeSearches(lambda line: searchEach(rules, line), lines)
+			self.assertEqual(found, expected)
+			self.assertEqual(sum(rule is not None for rule in found), len(lines[::20]))
+			self.assertLess(matcherTime * 2, eachTime, "{} rules".format(count))
+
+
+if __name__ == "__main__":
+	unittest.main()
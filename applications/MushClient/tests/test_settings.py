@@ -0,0 +1,177 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_settings.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import copy
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient import settings
+from mushclient.settings import AddonConfig, makeSpec, SettingsSwap
+
+
+SETTINGS = (
+	("presentation", "reportDynamicContentChanges"),
+	("reviewCursor", "followCaret"),
+	("keyboard", "speechInterruptForCharacters"),
+	("keyboard", "speechInterruptForEnter"),
+)
+
+
+def makeConf(dynamic, follow, characters, enter):
+	return {
+		"presentation": {"reportDynamicContentChanges": dynamic},
+		"reviewCursor": {"followCaret": follow},
+		"keyboard": {"speechInterruptForCharacters": characters, "speechInterruptForEnter": enter},
+	}
+
+
+class TestSettingsSwap(unittest.TestCase):
+	def setUp(self):
+		self.swap = SettingsSwap(SETTINGS)
+
+	def test_matchingSettingsAreNotWritten(self):
+		conf = makeConf(True, True, True, True)
+		for i in range(10):
+			self.swap.apply(conf, makeConf(True, True, True, True))
+			self.swap.restore(conf)
+		self.assertEqual(self.swap.writes, 0)
+
+	def test_onlyDifferingSettingsAreWritten(self):
+		conf = makeConf(True, True, True, True)
+		appConfig = makeConf(False, True, True, True)
+		self.swap.apply(conf, appConfig)
+		self.assertEqual(self.swap.writes, 1)
+		self.assertFalse(conf["presentation"]["reportDynamicContentChanges"])
+		current = self.swap.restore(conf)
+		self.assertEqual(self.swap.writes, 2)
+		self.assertTrue(conf["presentation"]["reportDynamicContentChanges"])
+		self.assertEqual(current[("presentation", "reportDynamicContentChanges")], False)
+
+	def test_writesPerFocusChange(self):
+		conf = makeConf(True, True, True, True)
+		appConfig = makeConf(False, False, True, True)
+		for i in range(10):
+			writes = self.swap.writes
+			self.swap.apply(conf, appConfig)
+			self.assertEqual(self.swap.writes - writes, 2)
+			writes = self.swap.writes
+			self.swap.restore(conf)
+			self.assertEqual(self.swap.writes - writes, 2)
+
+	def test_settingChangedByTheUserIsKept(self):
+		conf = makeConf(True, True, True, True)
+		self.swap.apply(conf, makeConf(False, True, True, True))
+		conf["keyboard"]["speechInterruptForEnter"] = False
+		current = self.swap.restore(conf)
+		self.assertFalse(current[("keyboard", "speechInterruptForEnter")])
+		self.assertTrue(conf["keyboard"]["speechInterruptForEnter"])
+		self.assertFalse(self.swap.isApplied)
+
+
+class FakeConfigObj(dict):
+	"""Stands in for a ConfigObj, starting with the values in the file last written by any instance."""
+
+	# The values of the most recently written file.
+	saved = {}
+
+	def __init__(self, path, **kwargs):
+		super(FakeConfigObj, self).__init__(copy.deepcopy(FakeConfigObj.saved))
+		self.path = path
+
+	def validate(self, validator, **kwargs):
+		return True
+
+	def write(self, output):
+		FakeConfigObj.saved = copy.deepcopy(dict(self))
+		for section in sorted(self):
+			output.write("[{}]\r\n".format(section).encode("utf-8"))
+			for key in sorted(self[section]):
+				output.write("{} = {}\r\n".format(key, self[section][key]).encode("utf-8"))
+
+
+class TestAddonConfig(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "config.ini")
+		FakeConfigObj.saved = makeConf(False, False, True, True)
+		self.originals = (settings.ConfigObj, settings.Validator, settings.replaceFile)
+		settings.ConfigObj = FakeConfigObj
+		settings.Validator = object
+		settings.replaceFile = os.rename
+		self.addonConfig = AddonConfig(self.path, "", "Test")
+		self.swap = SettingsSwap(SETTINGS)
+		self.conf = makeConf(True, True, True, True)
+
+	def tearDown(self):
+		settings.ConfigObj, settings.Validator, settings.replaceFile = self.originals
+		shutil.rmtree(self.directory)
+
+	def gainFocus(self):
+		# What the app module does when MushClient gains focus.
+		self.assertTrue(self.addonConfig.load())
+		self.swap.apply(self.conf, self.addonConfig)
+
+	def loseFocus(self):
+		for (section, key), value in self.swap.restore(self.conf).items():
+			self.addonConfig.set(section, key, value)
+		self.addonConfig.save()
+
+	def test_focusChurnWithoutChangesDoesNotWrite(self):
+		for i in range(100):
+			self.gainFocus()
+			self.loseFocus()
+		self.addonConfig.flush()
+		self.assertEqual(self.addonConfig.reads, 1)
+		self.assertEqual(self.addonConfig.writes, 0)
+		self.assertFalse(os.path.exists(self.path))
+		self.assertEqual(self.conf, makeConf(True, True, True, True))
+
+	def test_oneChangedValueIsWrittenOnce(self):
+		for i in range(100):
+			self.gainFocus()
+			if i == 50:
+				# The user turns on dynamic content reporting while in MushClient.
+				self.conf["presentation"]["reportDynamicContentChanges"] = True
+			self.loseFocus()
+		self.addonConfig.flush()
+		self.assertEqual(self.addonConfig.reads, 1)
+		self.assertEqual(self.addonConfig.writes, 1)
+		self.assertEqual(FakeConfigObj.saved, makeConf(True, False, True, True))
+		with open(self.path, "rb") as f:
+			self.assertIn(b"reportDynamicContentChanges = True\r\n", f.read())
+
+	def test_flushWaitsForWrite(self):
+		def slowReplaceFile(source, destination):
+			time.sleep(0.1)
+			os.rename(source, destination)
+
+		settings.replaceFile = slowReplaceFile
+		self.gainFocus()
+		self.conf["reviewCursor"]["followCaret"] = True
+		self.loseFocus()
+		self.assertEqual(self.addonConfig.writes, 0)
+		self.addonConfig.flush()
+		self.assertEqual(self.addonConfig.writes, 1)
+		self.assertTrue(os.path.exists(self.path))
+		self.assertFalse(os.path.exists(self.path + ".tmp"))
+		self.assertIsNone(self.addonConfig._writeThread)
+
+
+class TestMakeSpec(unittest.TestCase):
+	def test_sectionsAreGrouped(self):
+		spec = makeSpec((("a", "x", "boolean"), ("a", "y", "float"), ("b", "z", "string")))
+		self.assertEqual(spec, ["[a]", "x = boolean", "y = float", "[b]", "z = string"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,132 @@
+﻿# -*- coding: utf-8 -*-
+# tests/test_worlds.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+# Copyright (C) 2018 Nick Stockton <nstockton@gmail.com>
+
+# Built-in Python Modules
+import unittest
+
+# Local Modules
+import nvdaStubs
+from mushclient.flood import FloodControl
+from mushclient.output import Output
+from mushclient.worlds import BUSY_RETRY_DELAY, SpeechScheduler
+from test_flood import Clock, MAX_AGE
+
+
+INTERVAL = 3.0
+
+
+class FakeOutput(object):
+	def __init__(self):
+		self.isSpeaking = False
+		# The number of times delivery was queued again.
+		self.queuedCount = 0
+
+	def _queueDelivery(self):
+		self.queuedCount += 1
+
+
+class TestSpeechScheduler(unittest.TestCase):
+	def setUp(self):
+		nvdaStubs.reset()
+		self.clock = Clock()
+		self.scheduler = SpeechScheduler(INTERVAL, clock=self.clock)
+		self.focused = FakeOutput()
+		self.background = FakeOutput()
+		self.other = FakeOutput()
+		self.scheduler.focused = self.focused
+
+	def test_focusedWorldAlwaysSpeaks(self):
+		self.focused.isSpeaking = True
+		self.assertTrue(self.scheduler.mayDeliver(self.focused))
+		self.assertTrue(self.scheduler.mayDeliver(self.focused))
+		self.assertTrue(self.scheduler.isFocused(self.focused))
+		self.assertFalse(self.scheduler.isFocused(self.background))
+		self.assertEqual(nvdaStubs.callLaterCalls, [])
+		self.assertEqual(self.scheduler.deferredCount, 0)
+
+	def test_backgroundWorldWaitsWhileFocusedWorldSpeaks(self):
+		self.focused.isSpeaking = True
+		self.assertFalse(self.scheduler.mayDeliver(self.background))
+		self.assertEqual(nvdaStubs.callLaterCalls, [(int(BUSY_RETRY_DELAY * 1000), self.scheduler._retry)])
+		self.assertEqual(self.scheduler.deferredCount, 1)
+		self.focused.isSpeaking = False
+		self.assertTrue(self.scheduler.mayDeliver(self.background))
+
+	def test_backgroundUtterancesAreSpacedByTheInterval(self):
+		self.assertTrue(self.scheduler.mayDeliver(self.background))
+		self.clock.now = 1.0
+		self.assertFalse(self.scheduler.mayDeliver(self.other))
+		# The retry comes once the interval since the last background utterance has passed.
+		self.assertEqual(nvdaStubs.callLaterCalls, [(int((INTERVAL - 1.0) * 1000), self.scheduler._retry)])
+		self.clock.now = INTERVAL
+		self.assertTrue(self.scheduler.mayDeliver(self.other))
+		self.assertFalse(self.scheduler.mayDeliver(self.background))
+
+	def test_withoutFocusOnlyTheIntervalApplies(self):
+		self.scheduler.focused = None
+		self.assertTrue(self.scheduler.mayDeliver(self.background))
+		self.assertFalse(self.scheduler.mayDeliver(self.background))
+
+	def test_retryQueuesWaitingOutputsAgain(self):
+		self.focused.isSpeaking = True
+		self.assertFalse(self.scheduler.mayDeliver(self.background))
+		self.assertFalse(self.scheduler.mayDeliver(self.other))
+		self.assertFalse(self.scheduler.mayDeliver(self.background))
+		# Only one retry is scheduled, and each output waits once.
+		self.assertEqual(len(nvdaStubs.callLaterCalls), 1)
+		self.assertEqual(self.scheduler.deferredCount, 3)
+		delay, retry = nvdaStubs.callLaterCalls[0]
+		retry()
+		self.assertEqual((self.background.queuedCount, self.other.queuedCount), (1, 1))
+		retry()
+		self.assertEqual((self.background.queuedCount, self.other.queuedCount), (1, 1))
+		# Once retried, waiting schedules another retry.
+		self.assertFalse(self.scheduler.mayDeliver(self.other))
+		self.assertEqual(len(nvdaStubs.callLaterCalls), 2)
+
+	def test_forget(self):
+		self.focused.isSpeaking = True
+		self.scheduler.mayDeliver(self.background)
+		self.scheduler.forget(self.background)
+		self.scheduler.forget(self.focused)
+		self.assertIsNone(self.scheduler.focused)
+		nvdaStubs.callLaterCalls[0][1]()
+		self.assertEqual(self.background.queuedCount, 0)
+
+
+class TestBackgroundWorldSpeech(unittest.TestCase):
+	def setUp(self):
+		nvdaStubs.reset()
+		self.clock = Clock()
+		self.scheduler = SpeechScheduler(INTERVAL, clock=self.clock)
+		self.focused = self.makeOutput("Focused")
+		self.background = self.makeOutput("Background")
+		self.scheduler.focused = self.focused
+
+	def makeOutput(self, worldName):
+		output = nvdaStubs.makeOverlay(Output)
+		output.floodControl = FloodControl(MAX_AGE, clock=self.clock)
+		output.scheduler = self.scheduler
+		output.worldName = worldName
+		return output
+
+	def test_backgroundLinesWaitForTheFocusedWorld(self):
+		self.focused._queueSpeech(["one"])
+		self.background._queueSpeech(["two"])
+		nvdaStubs.pumpQueue()
+		self.assertEqual([sequence[0] for sequence in nvdaStubs.spoken], ["one"])
+		self.clock.now = 1.0
+		nvdaStubs.spoken[-1][-1].callback()
+		delay, retry = nvdaStubs.callLaterCalls[-1]
+		retry()
+		nvdaStubs.pumpQueue()
+		self.assertEqual([sequence[0] for sequence in nvdaStubs.spoken], ["one", "Background\ntwo"])
+		self.assertEqual(self.scheduler.deferredCount, 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
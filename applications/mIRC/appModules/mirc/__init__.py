@@ -0,0 +1,140 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/mirc
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2010 James Teh <jamie@jantrid.net>
+#Copyright (C) 2016 Nick Stockton <nstockton@gmail.com>
+
+"""App module for mIRC
+"""
+
+
+# Built-in Python Modules
+import os.path
+from timeit import default_timer
+
+# Built-in NVDA Modules
+import addonHandler
+import appModuleHandler
+import api
+import oleacc
+import config
+import controlTypes
+from logHandler import log
+import nvdaBuiltin.appModules.mirc
+import NVDAObjects.IAccessible
+import speech
+import textInfos
+import ui
+
+# Local Modules
+from .settings import AddonConfig, makeSpec, SettingsSwap
+
+# Initialize translations
+addonHandler.initTranslation()
+
+# Script category for mIRC gestures.
+# Translators: The name of the mIRC gestures category.
+SCRCAT_MIRC = _("mIRC")
+
+
+try:
+	REASON_CARET = controlTypes.REASON_CARET
+except AttributeError:
+	# NVDA >= 2021.1.0.
+	REASON_CARET = controlTypes.OutputReason.CARET
+
+
+# NVDA settings which are swapped for the mIRC ones while mIRC has focus.
+# Each is a section, a key, and the spec used to validate it in the mIRC configuration file.
+SETTINGS = (
+	("presentation", "reportDynamicContentChanges", "boolean(default=True)"),
+	("reviewCursor", "followCaret", "boolean(default=False)"),
+	("keyboard", "speechInterruptForCharacters", "boolean(default=False)"),
+	("keyboard", "speechInterruptForEnter", "boolean(default=True)"),
+)
+
+# Define default values in case the configuration file doesn't exist.
+CONFIG_SPEC = "\n".join(makeSpec(SETTINGS))
+
+
+class AppModule(nvdaBuiltin.appModules.mirc.AppModule):
+	def __init__(self, *args, **kwargs):
+		super(AppModule, self).__init__(*args, **kwargs)
+		path = os.path.join(addonHandler.getCodeAddon().path, "config.ini")
+		self.mircConfig = AddonConfig(path, CONFIG_SPEC, "mIRC")
+		self.settingsSwap = SettingsSwap((section, key) for section, key, spec in SETTINGS)
+
+	def terminate(self):
+		self.mircConfig.flush()
+		super(AppModule, self).terminate()
+
+	def event_NVDAObject_init(self, obj):
+		if isinstance(obj, NVDAObjects.IAccessible.IAccessible) and obj.windowClassName == "Static" and obj.windowControlID == 32918 and obj.IAccessibleRole == oleacc.ROLE_SYSTEM_STATICTEXT:
+			api.setNavigatorObject(obj)
+
+	def event_appModule_gainFocus(self):
+		if self.settingsSwap.isApplied:
+			# Don't clobber the saved NVDA settings.
+			return
+		# The mIRC configuration file is only read the first time, and kept in memory afterwards.
+		if not self.mircConfig.load():
+			return
+		# Save the original NVDA settings, and apply the mIRC ones which differ from them.
+		self.settingsSwap.apply(config.conf, self.mircConfig)
+
+	def event_appModule_loseFocus(self):
+		if not self.settingsSwap.isApplied:
+			# Don't save what isn't there.
+			return
+		# Restore the original NVDA settings, and save the current ones for mIRC.
+		# The file is only written, in the background, if a setting changed.
+		for (section, key), value in self.settingsSwap.restore(config.conf).items():
+			self.mircConfig.set(section, key, value)
+		self.mircConfig.save()
+
+	def script_review_bottom(self, gesture):
+		start = default_timer()
+		info = api.getReviewPosition().obj.makeTextInfo(textInfos.POSITION_LAST)
+		api.setReviewPosition(info)
+		info.expand(textInfos.UNIT_LINE)
+		speech.cancelSpeech()
+		speech.speakTextInfo(info, unit=textInfos.UNIT_LINE, reason=REASON_CARET)
+		log.debug("review_bottom took %.1f ms", (default_timer() - start) * 1000)
+	# Translators: Input help mode message for the review_bottom gesture.
+	script_review_bottom.__doc__ = _("Moves the review cursor to the bottom line of the current navigator object and speaks it")
+	script_review_bottom.category = SCRCAT_MIRC
+
+	def script_toggle_interrupt_chars(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForCharacters"]
+		config.conf[u"keyboard"][u"speechInterruptForCharacters"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on character press.
+		enabled = _("Interrupt on character press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on character press.
+		disabled = _("Interrupt on character press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_chars gesture.
+	script_toggle_interrupt_chars.__doc__ = _("Toggles the interrupting of speech when a character is pressed.")
+	script_toggle_interrupt_chars.category = SCRCAT_MIRC
+
+	def script_toggle_interrupt_enter(self, gesture):
+		value = not config.conf[u"keyboard"][u"speechInterruptForEnter"]
+		config.conf[u"keyboard"][u"speechInterruptForEnter"] = value
+		speech.cancelSpeech()
+		# Translators: Indicates that NVDA will interrupt on enter press.
+		enabled = _("Interrupt on enter press on.")
+		# Translators: Indicates that NVDA will *not* interrupt on enter press.
+		disabled = _("Interrupt on enter press off.")
+		ui.message(enabled if value else disabled)
+	# Translators: Input help mode message for the toggle_interrupt_enter gesture.
+	script_toggle_interrupt_enter.__doc__ = _("Toggles the interrupting of speech when the enter key is pressed.")
+	script_toggle_interrupt_enter.category = SCRCAT_MIRC
+
+	__gestures = {
+		"kb:NVDA+enter": "review_bottom",
+		"kb:numpadEnter": "review_bottom",
+		"kb:NVDA+8": "toggle_interrupt_chars",
+		"kb:NVDA+9": "toggle_interrupt_enter"
+	}
@@ -0,0 +1,197 @@
+﻿# -*- coding: utf-8 -*-
+#appModules/mirc/settings.py
+# A part of NonVisual Desktop Access (NVDA)
+# This file is covered by the GNU General Public License.
+# See the file COPYING for more details.
+#Copyright (C) 2010 James Teh <jamie@jantrid.net>
+#Copyright (C) 2016 Nick Stockton <nstockton@gmail.com>
+
+"""Add-on configuration which is kept in memory and written in the background
+"""
+
+
+# Built-in Python Modules
+import ctypes
+from io import BytesIO
+try:
+	from cStringIO import StringIO
+except ImportError:
+	# Python3
+	from io import StringIO
+import os
+import threading
+
+# Built-in NVDA Modules
+from configobj import ConfigObj
+from logHandler import log
+
+try:
+	from validate import Validator
+except ImportError:
+	# NVDA >= 2019.3.0.
+	from configobj.validate import Validator
+
+
+MOVEFILE_REPLACE_EXISTING = 0x1
+MOVEFILE_WRITE_THROUGH = 0x8
+
+
+def replaceFile(source, destination):
+	"""Atomically replaces destination with source."""
+	try:
+		os.replace(source, destination)
+	except AttributeError:
+		# Python2
+		flags = MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH
+		if not ctypes.windll.kernel32.MoveFileExW(unicode(source), unicode(destination), flags):
+			raise ctypes.WinError()
+
+
+def makeSpec(settings):
+	"""Builds configuration spec lines for a sequence of (section, key, spec) tuples."""
+	lines = []
+	section = None
+	for settingSection, key, spec in settings:
+		if settingSection != section:
+			section = settingSection
+			lines.append("[{}]".format(section))
+		lines.append("{} = {}".format(key, spec))
+	return lines
+
+
+class SettingsSwap(object):
+	"""Swaps NVDA settings for an application's own values while it has focus, and back again afterwards.
+	settings is a sequence of (section, key) pairs naming the NVDA settings to swap.
+	Only settings whose values differ are written, both when applying and when restoring.
+	"""
+
+	def __init__(self, settings):
+		self.settings = tuple(settings)
+		# The NVDA values from before the swap, or None if the application values aren't applied.
+		self.original = None
+		# The number of settings written to the NVDA configuration.
+		self.writes = 0
+
+	@property
+	def isApplied(self):
+		return self.original is not None
+
+	def _get(self, conf):
+		return dict(((section, key), conf[section][key]) for section, key in self.settings)
+
+	def _set(self, conf, values, current):
+		changes = [(setting, value) for setting, value in values.items() if current[setting] != value]
+		for (section, key), value in changes:
+			conf[section][key] = value
+		self.writes += len(changes)
+
+	def apply(self, conf, appConfig):
+		"""Saves the NVDA values of the settings, then applies the values from appConfig which differ from them."""
+		self.original = self._get(conf)
+		values = dict(((section, key), appConfig[section][key]) for section, key in self.settings)
+		self._set(conf, values, self.original)
+
+	def restore(self, conf):
+		"""Restores the NVDA values of the settings which differ from the current ones.
+		Returns the current values, so they can be saved for the application.
+		"""
+		current = self._get(conf)
+		self._set(conf, self.original, current)
+		self.original = None
+		return current
+
+
+class AddonConfig(object):
+	"""The add-on configuration, read from disk once and then kept in memory.
+	Changed values mark the configuration as dirty, and it is only written back, on a background thread, when it is dirty.
+	"""
+
+	def __init__(self, path, spec, name):
+		self.path = path
+		self.spec = spec
+		self.name = name
+		self.config = None
+		self.dirty = False
+		# The number of times the configuration file was read and written.
+		self.reads = 0
+		self.writes = 0
+		self._pending = None
+		self._pendingLock = threading.Lock()
+		self._writeLock = threading.Lock()
+		self._writeThread = None
+
+	def __getitem__(self, key):
+		return self.config[key]
+
+	def load(self):
+		"""Loads and validates the configuration file, unless it is already loaded.
+		Returns True if the configuration is available.
+		"""
+		if self.config is not None:
+			return True
+		try:
+			self.reads += 1
+			config = ConfigObj(
+				self.path,
+				configspec=StringIO(self.spec),
+				indent_type="\t",
+				default_encoding="utf-8",
+				encoding="utf-8",
+				stringify=True,
+			)
+			config.newlines = "\r\n"
+			val = Validator()
+			result = config.validate(val, preserve_errors=True, copy=True)
+		except Exception:
+			log.warning("Unable to load the %s add-on configuration file: %s", self.name, self.path)
+			return False
+		if not result:
+			log.warning("Corrupted %s add-on configuration file: %s", self.name, result)
+			return False
+		self.config = config
+		return True
+
+	def set(self, section, key, value):
+		if self.config[section][key] != value:
+			self.config[section][key] = value
+			self.dirty = True
+
+	def save(self):
+		"""Writes the configuration on a background thread if it changed since it was last saved."""
+		if self.config is None or not self.dirty:
+			return
+		self.dirty = False
+		output = BytesIO()
+		self.config.write(output)
+		with self._pendingLock:
+			self._pending = output.getvalue()
+		self._writeThread = threading.Thread(target=self._write, name="{}ConfigWriter".format(self.name))
+		self._writeThread.daemon = True
+		self._writeThread.start()
+
+	def _write(self):
+		with self._writeLock:
+			with self._pendingLock:
+				data = self._pending
+				self._pending = None
+			if data is None:
+				# A previous thread already wrote the latest data.
+				return
+			tempPath = self.path + ".tmp"
+			try:
+				with open(tempPath, "wb") as f:
+					f.write(data)
+					f.flush()
+					os.fsync(f.fileno())
+				replaceFile(tempPath, self.path)
+			except EnvironmentError:
+				log.error("Unable to write the %s add-on configuration file: %s", self.name, self.path, exc_info=True)
+				return
+			self.writes += 1
+
+	def flush(self):
+		"""Saves any changes, and waits for them to be written."""
+		self.save()
+		if self._writeThread is not None:
+			self._writeThread.join()
+			self._writeThread = None
@@ -0,0 +1,395 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""App Module for radegast
+"""
+
+
+import addonHandler
+import api
+import appModuleHandler
+import controlTypes
+import core
+import globalVars
+import gui
+import oleacc
+import os
+import re
+import ui
+import winUser
+import windowUtils
+import wx
+from configobj import ConfigObj
+from cStringIO import StringIO
+from logHandler import log
+from NVDAObjects.window import edit
+from NVDAObjects.IAccessible import getNVDAObjectFromEvent
+from os.path import join as joinPath
+from validate import Validator
+
+from archive import ArchiveWriter, HistoryArchive
+from coalescer import SpeechCoalescer
+from configWriter import ConfigWriter
+from history import formatEntry, HistoryState, HistoryStates
+from sources import WindowHistorySource
+
+CONFIG_FILE_NAME = "radegast_config.ini"
+ADDON_CONFIG = None
+CONFIG_WRITER = None
+# Seconds to wait for further changes before writing the configuration.
+CONFIG_WRITE_DELAY = 2.0
+
+ADDON_CONFIG_SPEC = """
+useTimeStamps = boolean(default=True)
+maxHistoryLines = integer(default=5000, min=1)
+maxHistoryWindows = integer(default=100, min=1)
+coalesceDelay = float(default=0.3, min=0.0)
+maxSpeechBacklog = integer(default=10, min=1)
+catchUpLines = integer(default=3, min=1)
+archiveHistory = boolean(default=True)
+"""
+
+
+def loadAddonConfig(fileName):
+	global ADDON_CONFIG, CONFIG_WRITER
+	if not ADDON_CONFIG:
+		path = joinPath(addonHandler.getCodeAddon().path, fileName)
+		ADDON_CONFIG = ConfigObj(path, configspec=StringIO(ADDON_CONFIG_SPEC), default_encoding="utf-8", encoding="utf-8", stringify=True)
+		ADDON_CONFIG.newlines = "\n"
+		val = Validator()
+		result = ADDON_CONFIG.validate(val, preserve_errors=True, copy=True)
+		if result != True:
+			log.warning("Corrupted add-on configuration file: %s", result)
+		CONFIG_WRITER = ConfigWriter(ADDON_CONFIG, CONFIG_WRITE_DELAY)
+
+def saveAddonConfig():
+	if not ADDON_CONFIG:
+		raise RuntimeError("Failed to load configuration file from the add-on folder.")
+	# Values are only ever changed to valid ones after loading, so the configuration is written without validating it again.
+	CONFIG_WRITER.markDirty()
+
+
+class HistoryText(edit.Edit):
+
+	def isVisible(self):
+		return self.appModule.isHistoryVisible(self)
+
+	def _get_historyState(self):
+		return self.appModule.historyStates.get(self.windowHandle)
+
+	def getInfo(self, key):
+		return getattr(self.historyState, key)
+
+	def setInfo(self, **kwargs):
+		state = self.historyState
+		for key, value in kwargs.iteritems():
+			setattr(state, key, value)
+
+	def isSilent(self):
+		return self.getInfo("silent")
+
+	def getLines(self):
+		return self.getInfo("parser").history
+
+	def getLine(self, index):
+		return self.formatLine(self.getLines()[index])
+
+	def formatLine(self, entry):
+		return formatEntry(entry, ADDON_CONFIG[u"useTimeStamps"])
+
+	def speakLines(self, lines):
+		for entry in lines:
+			if self.isSilent() or self.appModule.isSilent:
+				continue
+			line = self.formatLine(entry)
+			if self.getInfo("name") and not self.isVisible():
+				self.appModule.speechCoalescer.add("%s %s" % (self.getInfo("name"), line))
+			else:
+				self.appModule.speechCoalescer.add(line)
+
+	def event_valueChange(self):
+		self.speakLines(self.getInfo("parser").update(WindowHistorySource(self)))
+
+	def initOverlayClass(self):
+		newLines = []
+		if self.historyState is None:
+			state = HistoryState(ADDON_CONFIG[u"maxHistoryLines"])
+			newLines = state.parser.update(WindowHistorySource(self))
+			self.appModule.historyStates.add(self.windowHandle, state)
+		if not self.getInfo("name") and self.isVisible():
+			checkedTabName = self.appModule.getCheckedTabName()
+			if checkedTabName:
+				self.setInfo(name=checkedTabName)
+				archive = self.appModule.getArchive(checkedTabName)
+				if archive is not None:
+					self.getInfo("parser").attachArchive(archive)
+		if len(newLines)>1 and newLines[-2][0]=="====":
+			# Only the first message of a new conversation is reported when the window is first seen.
+			self.speakLines(newLines[-1:])
+
+
+class AppModule(appModuleHandler.AppModule):
+	historyWindowClassName = "WindowsForms10.RichEdit20W.app.0.33c0d9d"
+	isSilent = False
+	tabsObj = None
+	lastSearch = u""
+
+	def __init__(self, *args, **kwargs):
+		super(AppModule, self).__init__(*args, **kwargs)
+		if not ADDON_CONFIG:
+			loadAddonConfig(CONFIG_FILE_NAME)
+		# Visibility of history windows, keyed by window handle, and the name of the checked tab.
+		# Both are only recalculated after a foreground, selection, or state change.
+		self.visibilityCache = {}
+		self.checkedTabNameCache = None
+		self.historyStates = HistoryStates(ADDON_CONFIG[u"maxHistoryWindows"], winUser.isWindow)
+		self.speechCoalescer = SpeechCoalescer(ui.message, ADDON_CONFIG[u"coalesceDelay"], ADDON_CONFIG[u"maxSpeechBacklog"], ADDON_CONFIG[u"catchUpLines"], callLater=lambda delay, func: core.callLater(int(delay * 1000), func))
+		# History archives, keyed by tab name.
+		self.archives = {}
+		self.archiveWriter = None
+		if ADDON_CONFIG[u"archiveHistory"]:
+			self.archiveWriter = ArchiveWriter()
+			self.archiveWriter.start()
+
+	def terminate(self):
+		CONFIG_WRITER.flush()
+		if self.archiveWriter is not None:
+			self.archiveWriter.stop()
+		for archive in self.archives.itervalues():
+			archive.close()
+		super(AppModule, self).terminate()
+
+	def getArchive(self, name):
+		if self.archiveWriter is None:
+			return None
+		if name not in self.archives:
+			directory = joinPath(globalVars.appArgs.configPath, "radegastArchive")
+			try:
+				if not os.path.isdir(directory):
+					os.makedirs(directory)
+				self.archives[name] = HistoryArchive(joinPath(directory, re.sub(r"[^\w\- ]", "_", name, flags=re.UNICODE)), self.archiveWriter)
+			except (IOError, OSError):
+				log.error("Unable to open the history archive for %s" % name, exc_info=True)
+				self.archives[name] = None
+		return self.archives[name]
+
+	def chooseNVDAObjectOverlayClasses(self, obj, clsList):
+		if obj.windowClassName==self.historyWindowClassName and obj.IAccessibleRole==oleacc.ROLE_SYSTEM_TEXT and controlTypes.STATE_READONLY in obj.states:
+			clsList.insert(0, HistoryText)
+		elif obj.windowClassName=="WindowsForms10.Window.8.app.0.33c0d9d" and obj.IAccessibleRole==oleacc.ROLE_SYSTEM_PUSHBUTTON and obj.name=="Chat" and obj.parent.windowClassName=="WindowsForms10.Window.8.app.0.33c0d9d" and obj.parent.IAccessibleRole==oleacc.ROLE_SYSTEM_TOOLBAR and obj.parent.name=="toolStrip1":
+			self.tabsObj = obj.parent
+
+	def getCheckedTab(self):
+		try:
+			if not self.tabsObj:
+				self.tabsObj = api.getForegroundObject().parent.lastChild.lastChild.firstChild.firstChild.firstChild.firstChild.firstChild.firstChild.firstChild.lastChild.previous.firstChild.firstChild.firstChild
+			checkedItems = [child for child in self.tabsObj.children if child.name and controlTypes.STATE_CHECKED in child.states]
+			return None if not checkedItems else checkedItems[0]
+		except AttributeError:
+			return None
+
+	def getCheckedTabName(self):
+		if self.checkedTabNameCache is None:
+			checkedTab = self.getCheckedTab()
+			self.checkedTabNameCache = checkedTab.name if checkedTab else u""
+		return self.checkedTabNameCache
+
+	def isHistoryVisible(self, obj):
+		try:
+			return self.visibilityCache[obj.windowHandle]
+		except KeyError:
+			pass
+		try:
+			visible = windowUtils.findDescendantWindow(api.getForegroundObject().windowHandle, visible=True, controlID=obj.windowControlID, className=self.historyWindowClassName) == obj.windowHandle
+		except LookupError:
+			visible = False
+		self.visibilityCache[obj.windowHandle] = visible
+		return visible
+
+	def invalidateWindowCache(self):
+		self.visibilityCache.clear()
+		self.checkedTabNameCache = None
+
+	def event_foreground(self, obj, nextHandler):
+		self.invalidateWindowCache()
+		self.historyStates.prune()
+		nextHandler()
+
+	def event_selection(self, obj, nextHandler):
+		self.invalidateWindowCache()
+		nextHandler()
+
+	def event_stateChange(self, obj, nextHandler):
+		self.invalidateWindowCache()
+		nextHandler()
+
+	def getHistoryObj(self):
+		try:
+			return getNVDAObjectFromEvent(windowUtils.findDescendantWindow(api.getForegroundObject().windowHandle, visible=True, className=self.historyWindowClassName), winUser.OBJID_CLIENT, 0)
+		except LookupError:
+			ui.message("No history window found.")
+			return None
+
+	def script_reviewUp(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		linePos = obj.getInfo("linePos")
+		if not historyLines.start <= linePos < historyLines.end:
+			linePos = historyLines.start
+		elif linePos > historyLines.start:
+			linePos -= 1
+		else:
+			ui.message("Top:")
+		obj.setInfo(linePos=linePos)
+		if not historyLines:
+			return ui.message("History empty.")
+		ui.message(obj.getLine(linePos))
+	script_reviewUp.__doc__=_("Review the previous history item.")
+
+	def script_reviewDown(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		linePos = obj.getInfo("linePos")
+		if not historyLines.start <= linePos < historyLines.end:
+			linePos = historyLines.start
+		elif linePos+1 < historyLines.end:
+			linePos += 1
+		else:
+			ui.message("Bottom:")
+		obj.setInfo(linePos=linePos)
+		if not historyLines:
+			return ui.message("History empty.")
+		ui.message(obj.getLine(linePos))
+	script_reviewDown.__doc__=_("Review the next history item.")
+
+	def script_reviewTop(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		obj.setInfo(linePos=historyLines.start)
+		ui.message("Top:")
+		if not historyLines:
+			return ui.message("History empty.")
+		ui.message(obj.getLine(historyLines.start))
+	script_reviewTop.__doc__=_("Set the review position to the first item in the history list.")
+
+	def script_reviewBottom(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		ui.message("Bottom:")
+		if not historyLines:
+			obj.setInfo(linePos=historyLines.start)
+			return ui.message("History empty.")
+		obj.setInfo(linePos=historyLines.end - 1)
+		ui.message(obj.getLine(historyLines.end - 1))
+	script_reviewBottom.__doc__=_("Set the review position to the last item in the history list.")
+
+	def script_startSelection(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		if not historyLines:
+			return ui.message("History empty.")
+		linePos = historyLines.clamp(obj.getInfo("linePos"))
+		obj.setInfo(linePos=linePos, startMark=linePos)
+		ui.message("Start marked.")
+		ui.message(obj.getLine(linePos))
+	script_startSelection.__doc__=_("Mark the current review position in the history list as the start of a selection to be copied.")
+
+	def script_copySelection(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		historyLines = obj.getLines()
+		if not historyLines:
+			return ui.message("History empty.")
+		linePos = obj.getInfo("linePos")
+		startMark = obj.getInfo("startMark")
+		if startMark==None or linePos>=historyLines.end:
+			ui.message("No start marker set.")
+		elif api.copyToClip("\r\n".join(obj.getLine(index) for index in xrange(historyLines.clamp(startMark), linePos+1))):
+			obj.setInfo(startMark=None)
+			ui.message("Selection copied.")
+	script_copySelection.__doc__=_("Copy the history lines from the location of the start marker up to and including the last reviewed line to the clipboard.")
+
+	def findInHistory(self, forward):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		if not self.lastSearch:
+			return ui.message("No search text.")
+		historyLines = obj.getLines()
+		index = obj.getInfo("parser").index.find(self.lastSearch, obj.getInfo("linePos"), historyLines.start, historyLines.end, forward)
+		if index is None:
+			return ui.message("Not found.")
+		obj.setInfo(linePos=index)
+		ui.message(obj.getLine(index))
+
+	def script_find(self,gesture):
+		if not self.getHistoryObj():
+			return
+		d = wx.TextEntryDialog(gui.mainFrame, "Type the words you wish to find", "Find in history", self.lastSearch)
+		def callback(result):
+			if result == wx.ID_OK:
+				self.lastSearch = d.Value
+				# Let the focus return to Radegast before searching.
+				wx.CallLater(100, self.findInHistory, True)
+		gui.runScriptModalDialog(d, callback)
+	script_find.__doc__=_("Find the next line in the history list containing all of the given words.")
+
+	def script_findNext(self,gesture):
+		self.findInHistory(True)
+	script_findNext.__doc__=_("Find the next line in the history list containing the words last searched for.")
+
+	def script_findPrevious(self,gesture):
+		self.findInHistory(False)
+	script_findPrevious.__doc__=_("Find the previous line in the history list containing the words last searched for.")
+
+	def script_toggleTimeStamps(self,gesture):
+		ADDON_CONFIG[u"useTimeStamps"] = ADDON_CONFIG[u"useTimeStamps"] != True
+		saveAddonConfig()
+		ui.message("Time Stamps %s." % ("enabled" if ADDON_CONFIG[u"useTimeStamps"] else "disabled"))
+	script_toggleTimeStamps.__doc__=_("Toggle the speaking of time stamps in history windows.")
+
+	def script_toggleSilenceAll(self,gesture):
+		self.isSilent = self.isSilent != True
+		if self.isSilent:
+			self.speechCoalescer.clear()
+		ui.message("Speech %s for all history windows." % ("enabled" if not self.isSilent else "disabled"))
+	script_toggleSilenceAll.__doc__=_("Toggle automatic speaking of incoming text for all history windows.")
+
+	def script_toggleSilenceWindow(self,gesture):
+		obj = self.getHistoryObj()
+		if not obj:
+			return
+		isSilent = obj.isSilent() != True
+		obj.setInfo(silent=isSilent)
+		ui.message("Speech %s for current history window." % ("enabled" if not isSilent else "disabled"))
+	script_toggleSilenceWindow.__doc__=_("Toggle automatic speaking of incoming text for the current window.")
+
+	__gestures = {
+		"kb:NVDA+pageUp": "reviewUp",
+		"kb:NVDA+pageDown": "reviewDown",
+		"kb:control+NVDA+pageUp": "reviewTop",
+		"kb:control+NVDA+pageDown": "reviewBottom",
+		"kb:shift+NVDA+pageUp": "startSelection",
+		"kb:shift+NVDA+pageDown": "copySelection",
+		"kb:control+NVDA+f": "find",
+		"kb:NVDA+f3": "findNext",
+		"kb:shift+NVDA+f3": "findPrevious",
+		"kb:control+shift+NVDA+s": "toggleTimeStamps",
+		"kb:f6": "toggleSilenceAll",
+		"kb:shift+f6": "toggleSilenceWindow",
+	}
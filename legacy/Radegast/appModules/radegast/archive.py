@@ -0,0 +1,163 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/archive.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Persistent on-disk archives of Radegast history
+"""
+
+
+import mmap
+import os
+from Queue import Queue
+import struct
+import threading
+
+from logHandler import log
+
+# Each index record holds the offset in the data file just past the end of a line.
+INDEX_RECORD = struct.Struct("<Q")
+
+
+class HistoryArchive(object):
+	"""An append only archive of history lines, stored in a pair of files.
+	The data file holds the UTF-8 encoded lines back to back, and the index file holds a fixed width record for each line, so any line can be read through memory maps without loading the archive into memory.
+	Lines are appended by an ArchiveWriter thread, and read on the main thread.
+	"""
+
+	def __init__(self, path, writer):
+		self.dataPath = path + ".txt"
+		self.indexPath = path + ".idx"
+		self.writer = writer
+		for filePath in (self.dataPath, self.indexPath):
+			if not os.path.exists(filePath):
+				open(filePath, "wb").close()
+		# Discard anything left over from an interrupted write, so the two files agree.
+		indexSize = os.path.getsize(self.indexPath)
+		indexSize -= indexSize % INDEX_RECORD.size
+		with open(self.indexPath, "r+b") as f:
+			f.truncate(indexSize)
+			if indexSize:
+				f.seek(indexSize - INDEX_RECORD.size)
+				dataSize = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[0]
+			else:
+				dataSize = 0
+		with open(self.dataPath, "r+b") as f:
+			f.truncate(dataSize)
+		# The number of lines in the archive, including those still waiting to be written.
+		self.lineCount = indexSize // INDEX_RECORD.size
+		self._dataFile = None
+		self._indexFile = None
+		self._dataMap = None
+		self._indexMap = None
+		self._mappedCount = 0
+		# Files used by the writer thread.
+		self._dataWriteFile = None
+		self._indexWriteFile = None
+
+	def append(self, line):
+		self.lineCount += 1
+		self.writer.queue.put((self, line.encode("utf-8")))
+
+	def _write(self, lines):
+		"""Write encoded lines to the end of the archive. Only called from the writer thread."""
+		if self._dataWriteFile is None:
+			self._dataWriteFile = open(self.dataPath, "ab")
+			self._indexWriteFile = open(self.indexPath, "ab")
+		records = []
+		for data in lines:
+			self._dataWriteFile.write(data)
+			records.append(INDEX_RECORD.pack(self._dataWriteFile.tell()))
+		# The data must be on disk before the index records which refer to it.
+		self._dataWriteFile.flush()
+		self._indexWriteFile.write(b"".join(records))
+		self._indexWriteFile.flush()
+
+	def _map(self):
+		self._unmap()
+		if self._dataFile is None:
+			self._dataFile = open(self.dataPath, "rb")
+			self._indexFile = open(self.indexPath, "rb")
+		# Map the index first, so the data map covers every line in it.
+		if os.fstat(self._indexFile.fileno()).st_size:
+			self._indexMap = mmap.mmap(self._indexFile.fileno(), 0, access=mmap.ACCESS_READ)
+			self._dataMap = mmap.mmap(self._dataFile.fileno(), 0, access=mmap.ACCESS_READ)
+			self._mappedCount = len(self._indexMap) // INDEX_RECORD.size
+
+	def _unmap(self):
+		for fileMap in (self._dataMap, self._indexMap):
+			if fileMap is not None:
+				fileMap.close()
+		self._dataMap = None
+		self._indexMap = None
+		self._mappedCount = 0
+
+	def getLine(self, number):
+		"""Return the line with the given number, or None if it has not been written yet."""
+		if not 0 <= number < self.lineCount:
+			return None
+		if number >= self._mappedCount:
+			self._map()
+			if number >= self._mappedCount:
+				return None
+		end = INDEX_RECORD.unpack_from(self._indexMap, number * INDEX_RECORD.size)[0]
+		start = INDEX_RECORD.unpack_from(self._indexMap, (number - 1) * INDEX_RECORD.size)[0] if number else 0
+		return self._dataMap[start:end].decode("utf-8")
+
+	def close(self):
+		self._unmap()
+		for f in (self._dataFile, self._indexFile):
+			if f is not None:
+				f.close()
+		self._dataFile = None
+		self._indexFile = None
+
+	def _closeWriteFiles(self):
+		for f in (self._dataWriteFile, self._indexWriteFile):
+			if f is not None:
+				f.close()
+		self._dataWriteFile = None
+		self._indexWriteFile = None
+
+
+class ArchiveWriter(threading.Thread):
+	"""A background thread which writes the lines appended to history archives, so that ingesting chat never waits on the disk."""
+
+	def __init__(self):
+		super(ArchiveWriter, self).__init__(name="RadegastArchiveWriter")
+		self.daemon = True
+		self.queue = Queue()
+		self._archives = set()
+
+	def run(self):
+		while True:
+			item = self.queue.get()
+			batches = {}
+			# Write everything waiting in one go, keeping each archive's lines in order.
+			while True:
+				if item is None:
+					self._write(batches)
+					for archive in self._archives:
+						archive._closeWriteFiles()
+					return
+				archive, data = item
+				batches.setdefault(archive, []).append(data)
+				if self.queue.empty():
+					break
+				item = self.queue.get()
+			self._write(batches)
+
+	def _write(self, batches):
+		for archive, lines in batches.iteritems():
+			self._archives.add(archive)
+			try:
+				archive._write(lines)
+			except (IOError, OSError):
+				log.error("Unable to write to the history archive %s" % archive.dataPath, exc_info=True)
+
+	def stop(self):
+		"""Write any waiting lines, then stop the thread."""
+		self.queue.put(None)
+		self.join()
@@ -0,0 +1,73 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/coalescer.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Coalescing of incoming Radegast chat into as few utterances as possible
+"""
+
+
+import time
+
+
+class SpeechCoalescer(object):
+	"""Batches the lines which arrive within delay seconds of each other into a single utterance.
+	When more than maxBacklog lines are waiting, only the newest catchUpLines lines are spoken, preceded by a count of the lines which were skipped.
+	The clock and the function used for scheduling delayed calls can be replaced, so the timing can be driven by hand.
+	callLater is called with a delay in seconds and a callable, and may be None if poll will be called by the owner.
+	"""
+
+	def __init__(self, speak, delay, maxBacklog, catchUpLines, clock=time.time, callLater=None):
+		self.speak = speak
+		self.delay = delay
+		self.maxBacklog = maxBacklog
+		self.catchUpLines = catchUpLines
+		self.clock = clock
+		self.callLater = callLater
+		self.pending = []
+		# The time at which the oldest pending line arrived.
+		self.firstTime = None
+		self.isScheduled = False
+
+	def _schedule(self, delay):
+		if self.callLater is not None and not self.isScheduled:
+			self.isScheduled = True
+			self.callLater(delay, self.poll)
+
+	def add(self, line):
+		if not self.pending:
+			self.firstTime = self.clock()
+		self.pending.append(line)
+		self._schedule(self.delay)
+
+	def poll(self):
+		"""Speak the pending lines if the oldest of them has waited long enough, otherwise schedule another poll.
+		Returns True if anything was spoken.
+		"""
+		self.isScheduled = False
+		if not self.pending:
+			return False
+		remaining = self.firstTime + self.delay - self.clock()
+		if remaining > 0:
+			self._schedule(remaining)
+			return False
+		self.flush()
+		return True
+
+	def flush(self):
+		"""Speak the pending lines immediately."""
+		lines = self.pending
+		self.clear()
+		if not lines:
+			return
+		if len(lines) > max(self.maxBacklog, self.catchUpLines):
+			skipped = len(lines) - self.catchUpLines
+			lines = ["%d lines skipped." % skipped] + lines[skipped:]
+		self.speak("\n".join(lines))
+
+	def clear(self):
+		"""Discard the pending lines without speaking them."""
+		self.pending = []
+		self.firstTime = None
@@ -0,0 +1,90 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/configWriter.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Background writing of the Radegast add-on configuration
+"""
+
+
+import ctypes
+from cStringIO import StringIO
+import os
+import threading
+
+from logHandler import log
+
+MOVEFILE_REPLACE_EXISTING = 0x1
+MOVEFILE_WRITE_THROUGH = 0x8
+
+
+def replaceFile(source, destination):
+	"""Atomically replace destination with source."""
+	if not ctypes.windll.kernel32.MoveFileExW(unicode(source), unicode(destination), MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH):
+		raise ctypes.WinError()
+
+
+class ConfigWriter(object):
+	"""Writes a ConfigObj to its file in the background, once it has gone unchanged for delay seconds.
+	The configuration is serialized on the thread which marks it dirty, and a timer thread writes the result to a temporary file which then replaces the configuration file, so the file is never left half written.
+	The disk is only touched outside the lock taken by markDirty, so marking the configuration dirty never waits for a write.
+	The timer class can be replaced, so the writes can be driven by hand.
+	"""
+
+	def __init__(self, config, delay, timer=threading.Timer):
+		self.config = config
+		self.delay = delay
+		self.timer = timer
+		self.writeCount = 0
+		self._lock = threading.Lock()
+		# Serializes writes, so an older configuration never replaces a newer one.
+		self._writeLock = threading.Lock()
+		# The serialized configuration waiting to be written, if any.
+		self._pending = None
+		self._timer = None
+
+	def markDirty(self):
+		output = StringIO()
+		self.config.write(output)
+		with self._lock:
+			self._pending = output.getvalue()
+			if self._timer is not None:
+				self._timer.cancel()
+			self._timer = self.timer(self.delay, self.flush)
+			self._timer.daemon = True
+			self._timer.start()
+
+	def flush(self):
+		"""Write any pending changes immediately.
+		If they can't be written, they are kept pending, so the next flush tries again.
+		"""
+		with self._writeLock:
+			with self._lock:
+				if self._timer is not None:
+					self._timer.cancel()
+					self._timer = None
+				data = self._pending
+				self._pending = None
+			if data is None:
+				return
+			tempPath = self.config.filename + ".tmp"
+			try:
+				with open(tempPath, "wb") as f:
+					f.write(data)
+					f.flush()
+					os.fsync(f.fileno())
+				replaceFile(tempPath, self.config.filename)
+			except EnvironmentError:
+				log.error("Unable to write the add-on configuration file %s" % self.config.filename, exc_info=True)
+				try:
+					os.remove(tempPath)
+				except OSError:
+					pass
+				with self._lock:
+					# Changes made since are newer than the ones which couldn't be written.
+					if self._pending is None:
+						self._pending = data
+				return
+			self.writeCount += 1
@@ -0,0 +1,280 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/history.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Incremental parsing of the text in Radegast history windows
+"""
+
+
+from collections import deque, OrderedDict
+import re
+
+from search import SearchIndex
+
+TIMESTAMPREGEX = re.compile(r"^(\d+-\d+-\d+ \[\d+:\d+:\d+\]|\[\d+:\d+\]) ")
+
+# The number of the last terminated lines used to find where parsing left off in rewritten text.
+ANCHORLINES = 3
+
+
+def makeEntry(line):
+	"""Return a tuple of the line and the length of its time stamp prefix."""
+	match = TIMESTAMPREGEX.match(line)
+	return (line, match.end() if match else 0)
+
+
+def formatEntry(entry, useTimeStamps):
+	"""Return the line of an entry, with its time stamp removed by slicing unless useTimeStamps is True."""
+	line, stampLength = entry
+	return line if useTimeStamps else line[stampLength:]
+
+
+class RingBuffer(object):
+	"""A sequence with a fixed capacity, which discards its oldest items as new ones are appended.
+	Items are addressed by absolute index, counting every item ever appended, so an index keeps referring to the same item until it is discarded.
+	"""
+
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.clear()
+
+	def clear(self):
+		self._items = [None] * self.capacity
+		# The absolute index of the oldest item.
+		self.start = 0
+		# The absolute index one past the newest item.
+		self.end = 0
+
+	def discardAll(self):
+		"""Discard every item, without reusing their indexes."""
+		self._items = [None] * self.capacity
+		self.start = self.end
+
+	def __len__(self):
+		return self.end - self.start
+
+	def __getitem__(self, index):
+		if not self.start <= index < self.end:
+			raise IndexError("Ring buffer index out of range: %d" % index)
+		return self._items[index % self.capacity]
+
+	def append(self, item):
+		"""Append an item, returning the item it displaced, or None if the buffer was not full."""
+		discarded = None
+		if self.end - self.start == self.capacity:
+			discarded = self._items[self.start % self.capacity]
+			self.start += 1
+		self._items[self.end % self.capacity] = item
+		self.end += 1
+		return discarded
+
+	def pop(self):
+		if self.end == self.start:
+			raise IndexError("Pop from an empty ring buffer.")
+		self.end -= 1
+		item = self._items[self.end % self.capacity]
+		self._items[self.end % self.capacity] = None
+		return item
+
+	def clamp(self, index):
+		"""Return the nearest index to the given one which is in the buffer."""
+		return max(self.start, min(index, self.end - 1))
+
+
+class HistoryLines(object):
+	"""The lines of a history window, both those in its ring buffer and those which have aged out of the buffer into its archive.
+	Lines are addressed by the indexes of the ring buffer, with indexes before the start of the buffer referring to archived lines.
+	"""
+
+	def __init__(self, lines):
+		self.lines = lines
+		self.archive = None
+		# Added to an index to get the number of the line in the archive.
+		self.archiveOffset = 0
+
+	@property
+	def start(self):
+		if self.archive is None:
+			return self.lines.start
+		return min(self.lines.start, -self.archiveOffset)
+
+	@property
+	def end(self):
+		return self.lines.end
+
+	def __len__(self):
+		return self.end - self.start
+
+	def __getitem__(self, index):
+		if index >= self.lines.start or self.archive is None:
+			return self.lines[index]
+		if index < self.start:
+			raise IndexError("History index out of range: %d" % index)
+		line = self.archive.getLine(index + self.archiveOffset)
+		# The line may still be waiting to be written.
+		return makeEntry(line if line is not None else u"")
+
+	def clamp(self, index):
+		return max(self.start, min(index, self.end - 1))
+
+
+class HistoryParser(object):
+	"""Splits history text into lines, only parsing the text which was appended since the previous update.
+	Parsed lines are kept in a ring buffer holding at most maxLines lines.
+	Each line is stored as a tuple of its text and the length of its time stamp prefix, so the time stamp can be removed by slicing.
+	The words of the lines in the buffer are kept in a search index, which excludes time stamps.
+	Once an archive is attached, every terminated line is also appended to the archive.
+	"""
+
+	def __init__(self, maxLines):
+		# The non-blank lines parsed so far.
+		self.lines = RingBuffer(maxLines)
+		self.history = HistoryLines(self.lines)
+		self.index = SearchIndex()
+		self.reset()
+
+	def reset(self):
+		self.lines.discardAll()
+		self.index.clear()
+		# The number of lines in the history the last time it was read.
+		self.lineCount = 0
+		# The offset just past the last line terminator consumed.
+		self.offset = 0
+		# The raw text of the last terminated line, used to detect when the text was rewritten.
+		self.lastRaw = u""
+		# The raw text of the last few terminated lines, used to find where parsing left off once the text was rewritten.
+		self.recentRaw = deque(maxlen=ANCHORLINES)
+		# Text at the end of the history which has not been terminated yet.
+		self.partial = u""
+
+	def update(self, source):
+		"""Read the history from a HistorySource, returning the non-blank lines which are new since the last call.
+		Only the lines after the last terminated line are fetched, unless the history shrank or was rewritten.
+		"""
+		lineCount = source.getLineCount()
+		length = source.getLength()
+		rewritten = (
+			lineCount < self.lineCount
+			or length < self.offset
+			or source.getText(self.offset - len(self.lastRaw), self.offset) != self.lastRaw
+		)
+		if rewritten:
+			newLines = self._rescan(source.getText(0, length))
+		else:
+			newLines = self._parse(source.getText(self.offset, length), 0)
+		self.lineCount = lineCount
+		return newLines
+
+	def _parse(self, text, start):
+		previous = self.partial
+		if previous.strip():
+			# The unterminated line will be parsed again along with any text added to it.
+			line, stampLength = self.lines.pop()
+			self.index.remove(self.lines.end, line[stampLength:])
+		self.partial = u""
+		newLines = []
+		for raw in text[start:].splitlines(True):
+			line = raw.splitlines()[0]
+			if line == raw:
+				self.partial = raw
+			else:
+				self.offset += len(raw)
+				self.lastRaw = raw
+				self.recentRaw.append(raw)
+			if line.strip():
+				entry = makeEntry(line)
+				if line != raw and self.history.archive is not None:
+					self.history.archive.append(line)
+				discarded = self.lines.append(entry)
+				if discarded is not None:
+					self.index.discard(self.lines.start - 1, discarded[0][discarded[1]:])
+				self.index.add(self.lines.end - 1, line[entry[1]:])
+				if line != previous:
+					newLines.append(entry)
+			previous = None
+		return newLines
+
+	def _rescan(self, text):
+		# Text is only ever trimmed from the top, so the lines we consumed can't end after the old offset.
+		# Searching before it means a copy of them in newly appended text, such as a repeated separator line, is never mistaken for them.
+		# As many of the last lines as survived are matched together, so a single common line doesn't anchor the search on its own.
+		recent = list(self.recentRaw)
+		index = -1
+		while recent:
+			anchor = u"".join(recent)
+			index = text.rfind(anchor, 0, self.offset)
+			if index >= 0:
+				break
+			del recent[0]
+		if index < 0:
+			# Nothing we have already seen survived, so treat the whole text as old.
+			self.reset()
+			self._parse(text, 0)
+			return []
+		# Older history was trimmed from the top, so only report what follows the last line we consumed.
+		self.offset = index + len(anchor)
+		return self._parse(text, self.offset)
+
+	def attachArchive(self, archive):
+		"""Start archiving lines, first adding the terminated lines in the buffer which follow the last line already in the archive."""
+		lines = self.lines
+		end = lines.end - 1 if self.partial.strip() else lines.end
+		first = lines.start
+		lastLine = archive.getLine(archive.lineCount - 1)
+		if lastLine is not None:
+			for index in xrange(end - 1, lines.start - 1, -1):
+				if lines[index][0] == lastLine:
+					first = index + 1
+					break
+		self.history.archiveOffset = archive.lineCount - first
+		for index in xrange(first, end):
+			archive.append(lines[index][0])
+		self.history.archive = archive
+
+
+class HistoryState(object):
+	"""The state kept for a single history window."""
+
+	__slots__ = ("parser", "name", "linePos", "startMark", "silent")
+
+	def __init__(self, maxLines):
+		self.parser = HistoryParser(maxLines)
+		self.name = None
+		self.linePos = 0
+		self.startMark = None
+		self.silent = False
+
+
+class HistoryStates(object):
+	"""History window states keyed by window handle.
+	States of windows which no longer exist are evicted whenever a new state is added, as are the least recently used states once there are more than maxWindows.
+	"""
+
+	def __init__(self, maxWindows, isWindow):
+		self.maxWindows = maxWindows
+		self.isWindow = isWindow
+		self._states = OrderedDict()
+
+	def __len__(self):
+		return len(self._states)
+
+	def get(self, windowHandle):
+		state = self._states.pop(windowHandle, None)
+		if state is not None:
+			self._states[windowHandle] = state
+		return state
+
+	def add(self, windowHandle, state):
+		self.prune()
+		self._states.pop(windowHandle, None)
+		while len(self._states) >= self.maxWindows:
+			self._states.popitem(last=False)
+		self._states[windowHandle] = state
+
+	def prune(self):
+		"""Evict the states of destroyed windows."""
+		for windowHandle in [windowHandle for windowHandle in self._states if not self.isWindow(windowHandle)]:
+			del self._states[windowHandle]
@@ -0,0 +1,84 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/search.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Word index for searching Radegast history lines
+"""
+
+
+from bisect import bisect_left, bisect_right
+import re
+
+WORDREGEX = re.compile(r"\w+", re.UNICODE)
+
+
+def getWords(text):
+	return set(word.lower() for word in WORDREGEX.findall(text))
+
+
+class SearchIndex(object):
+	"""An inverted index from each word to the ascending absolute indexes of the lines containing it.
+	Lines must be added in order of index. Discarded lines are pruned lazily, so searches are bounded by the index of the oldest line still held.
+	"""
+
+	def __init__(self):
+		self._postings = {}
+
+	def clear(self):
+		self._postings.clear()
+
+	def add(self, index, text):
+		for word in getWords(text):
+			self._postings.setdefault(word, []).append(index)
+
+	def remove(self, index, text):
+		"""Remove the newest line, as when an unterminated line is parsed again."""
+		for word in getWords(text):
+			postings = self._postings.get(word)
+			if postings and postings[-1] == index:
+				postings.pop()
+				if not postings:
+					del self._postings[word]
+
+	def discard(self, index, text):
+		"""Forget the oldest line, as when it ages out of the history."""
+		for word in getWords(text):
+			postings = self._postings.get(word)
+			if not postings:
+				continue
+			# Only compact once the stale entries make up half the list, so each entry is moved a bounded number of times.
+			stale = bisect_right(postings, index)
+			if stale == len(postings):
+				del self._postings[word]
+			elif stale * 2 >= len(postings):
+				del postings[:stale]
+
+	def find(self, query, fromIndex, start, end, forward=True):
+		"""Return the index of the nearest line after fromIndex (or before it if not forward) which contains every word in query, and lies in the range start to end.
+		Returns None if there is no such line.
+		"""
+		words = getWords(query)
+		if not words:
+			return None
+		try:
+			postings = sorted((self._postings[word] for word in words), key=len)
+		except KeyError:
+			return None
+		rarest, others = postings[0], postings[1:]
+		if forward:
+			candidates = (rarest[i] for i in xrange(max(bisect_right(rarest, fromIndex), bisect_left(rarest, start)), len(rarest)))
+		else:
+			candidates = (rarest[i] for i in xrange(bisect_left(rarest, min(fromIndex, end)) - 1, -1, -1))
+		for index in candidates:
+			if not start <= index < end:
+				break
+			if all(self._contains(other, index) for other in others):
+				return index
+		return None
+
+	def _contains(self, postings, index):
+		i = bisect_left(postings, index)
+		return i < len(postings) and postings[i] == index
@@ -0,0 +1,78 @@
+﻿# -*- coding: UTF-8 -*-
+#appModules/radegast/sources.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Sources for reading parts of the text in Radegast history windows
+"""
+
+
+import textInfos
+import winUser
+from NVDAObjects.window import edit
+
+
+class HistorySource(object):
+	"""Base class for sources of history text.
+	Offsets are character positions within the history, and lines are the lines as counted by the control.
+	"""
+
+	def __init__(self):
+		# The number of characters copied out of the history so far.
+		self.charsCopied = 0
+
+	def getLineCount(self):
+		raise NotImplementedError
+
+	def getLength(self):
+		raise NotImplementedError
+
+	def _getText(self, start, end):
+		raise NotImplementedError
+
+	def getText(self, start, end):
+		if start >= end:
+			return u""
+		text = self._getText(start, end)
+		self.charsCopied += len(text)
+		return text
+
+
+class WindowHistorySource(HistorySource):
+	"""Reads history text from a rich edit control using line based window messages, so only the requested range crosses the process boundary."""
+
+	def __init__(self, obj):
+		super(WindowHistorySource, self).__init__()
+		self.obj = obj
+
+	def _sendMessage(self, msg, wParam=0, lParam=0):
+		return winUser.sendMessage(self.obj.windowHandle, msg, wParam, lParam)
+
+	def getLineCount(self):
+		return self._sendMessage(edit.EM_GETLINECOUNT)
+
+	def getLength(self):
+		lastLineStart = self._sendMessage(edit.EM_LINEINDEX, self.getLineCount() - 1)
+		return lastLineStart + self._sendMessage(edit.EM_LINELENGTH, lastLineStart)
+
+	def _getText(self, start, end):
+		return self.obj.makeTextInfo(textInfos.POSITION_FIRST)._getTextRange(start, end)
+
+
+class TextHistorySource(HistorySource):
+	"""An in-memory history source, used to measure how much text is copied without a real window."""
+
+	def __init__(self, text=u""):
+		super(TextHistorySource, self).__init__()
+		self.text = text
+
+	def getLineCount(self):
+		return len(self.text.splitlines()) or 1
+
+	def getLength(self):
+		return len(self.text)
+
+	def _getText(self, start, end):
+		return self.text[start:end]
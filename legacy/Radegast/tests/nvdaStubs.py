@@ -0,0 +1,44 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/nvdaStubs.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Makes the Radegast app module's own modules importable outside of NVDA
+"""
+
+
+import logging
+import os
+import sys
+import types
+
+APPMODULEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "appModules", "radegast")
+
+
+def install(*names):
+	"""Add an empty module for each dotted name which can't be imported, so modules which only use them at run time can be imported."""
+	for name in names:
+		parent = None
+		parts = name.split(".")
+		for i in range(len(parts)):
+			moduleName = ".".join(parts[:i + 1])
+			module = sys.modules.get(moduleName)
+			if module is None:
+				try:
+					module = __import__(moduleName, fromlist=["__name__"])
+				except ImportError:
+					module = sys.modules[moduleName] = types.ModuleType(moduleName)
+			if parent is not None:
+				setattr(parent, parts[i], module)
+			parent = module
+
+
+install("logHandler", "textInfos", "winUser", "NVDAObjects.window.edit")
+logHandler = sys.modules["logHandler"]
+if not hasattr(logHandler, "log"):
+	logHandler.log = logging.getLogger("radegast")
+	logHandler.log.addHandler(logging.NullHandler())
+if APPMODULEPATH not in sys.path:
+	sys.path.insert(0, APPMODULEPATH)
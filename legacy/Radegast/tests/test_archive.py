@@ -0,0 +1,140 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_archive.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import nvdaStubs
+from archive import ArchiveWriter, HistoryArchive, INDEX_RECORD
+from history import HistoryParser
+from sources import TextHistorySource
+
+
+class ArchiveTestCase(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "Local Chat")
+		self.archives = []
+
+	def tearDown(self):
+		for archive in self.archives:
+			archive.close()
+		shutil.rmtree(self.directory)
+
+	def open(self, writer=None):
+		archive = HistoryArchive(self.path, writer or ArchiveWriter())
+		self.archives.append(archive)
+		return archive
+
+	def write(self, lines):
+		"""Write lines to the archive through a writer thread, which is stopped once they are on disk."""
+		writer = ArchiveWriter()
+		archive = self.open(writer)
+		writer.start()
+		for line in lines:
+			archive.append(line)
+		writer.stop()
+		return archive
+
+	def readAll(self, archive):
+		return [archive.getLine(number) for number in range(archive.lineCount)]
+
+
+class TestHistoryArchive(ArchiveTestCase):
+	def test_linesAreInOrderAfterStop(self):
+		lines = [u"line %d" % i for i in range(1000)] + [u"Zoë: caf\xe9"]
+		archive = self.write(lines)
+		self.assertEqual(self.readAll(archive), lines)
+		# The archive can be read back once reopened.
+		self.assertEqual(self.readAll(self.open()), lines)
+
+	def test_unwrittenLinesAreNone(self):
+		writer = ArchiveWriter()
+		archive = self.open(writer)
+		archive.append(u"one")
+		archive.append(u"two")
+		self.assertEqual(archive.lineCount, 2)
+		# The writer thread hasn't started, so nothing is on disk yet.
+		self.assertEqual(archive.getLine(0), None)
+		self.assertEqual(archive.getLine(1), None)
+		writer.start()
+		writer.stop()
+		self.assertEqual(self.readAll(archive), [u"one", u"two"])
+		self.assertEqual(archive.getLine(2), None)
+		self.assertEqual(archive.getLine(-1), None)
+
+	def test_partialIndexRecordIsDiscarded(self):
+		self.write([u"one", u"two", u"three"]).close()
+		with open(self.path + ".idx", "ab") as f:
+			f.write(b"\x07\x00\x00")
+		archive = self.open()
+		self.assertEqual(archive.lineCount, 3)
+		self.assertEqual(os.path.getsize(self.path + ".idx"), 3 * INDEX_RECORD.size)
+		self.assertEqual(self.readAll(archive), [u"one", u"two", u"three"])
+
+	def test_dataBeyondTheLastOffsetIsDiscarded(self):
+		self.write([u"one", u"two"]).close()
+		# A line whose index record was never written.
+		with open(self.path + ".txt", "ab") as f:
+			f.write(b"lost")
+		self.assertEqual(self.readAll(self.open()), [u"one", u"two"])
+		self.assertEqual(os.path.getsize(self.path + ".txt"), len(b"onetwo"))
+		# Lines appended after recovery follow on from the last whole line.
+		archive = self.write([u"three"])
+		self.assertEqual(self.readAll(archive), [u"one", u"two", u"three"])
+
+	def test_emptyIndexDiscardsAllData(self):
+		with open(self.path + ".txt", "wb") as f:
+			f.write(b"orphaned")
+		open(self.path + ".idx", "wb").close()
+		archive = self.open()
+		self.assertEqual(archive.lineCount, 0)
+		self.assertEqual(os.path.getsize(self.path + ".txt"), 0)
+
+
+class TestAttachArchive(ArchiveTestCase):
+	def parse(self, parser, text):
+		source = TextHistorySource(text)
+		parser.update(source)
+
+	def test_bufferedLinesAlreadyArchivedAreNotRepeated(self):
+		self.write([u"one", u"two"]).close()
+		parser = HistoryParser(3)
+		self.parse(parser, u"one\r\ntwo\r\nthree\r\n")
+		writer = ArchiveWriter()
+		archive = self.open(writer)
+		writer.start()
+		parser.attachArchive(archive)
+		# The buffer's last two lines are the archive's last two lines.
+		self.assertEqual(parser.history.archiveOffset, 0)
+		self.parse(parser, u"one\r\ntwo\r\nthree\r\nfour\r\nfive\r\n")
+		writer.stop()
+		self.assertEqual(self.readAll(archive), [u"one", u"two", u"three", u"four", u"five"])
+		history = parser.history
+		self.assertEqual(history.lines.start, 2)
+		# Lines which aged out of the buffer are read from the archive.
+		self.assertEqual([history[index][0] for index in range(history.start, history.end)], [u"one", u"two", u"three", u"four", u"five"])
+
+	def test_unterminatedLineIsNotArchived(self):
+		self.write([u"old"]).close()
+		parser = HistoryParser(10)
+		self.parse(parser, u"one\r\ntwo")
+		writer = ArchiveWriter()
+		archive = self.open(writer)
+		writer.start()
+		parser.attachArchive(archive)
+		self.assertEqual(parser.history.archiveOffset, 1)
+		self.parse(parser, u"one\r\ntwo\r\n")
+		writer.stop()
+		self.assertEqual(self.readAll(archive), [u"old", u"one", u"two"])
+		self.assertEqual(parser.history[-1], (u"old", 0))
+
+
+if __name__ == "__main__":
+	unittest.main()
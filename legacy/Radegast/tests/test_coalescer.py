@@ -0,0 +1,96 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_coalescer.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import unittest
+
+import nvdaStubs
+from coalescer import SpeechCoalescer
+
+
+class TestSpeechCoalescer(unittest.TestCase):
+	def setUp(self):
+		self.now = 0.0
+		self.spoken = []
+		# The delay and function of each scheduled call, which are only run by hand.
+		self.calls = []
+		self.coalescer = SpeechCoalescer(self.spoken.append, 0.5, 5, 2, clock=lambda: self.now, callLater=self.callLater)
+
+	def callLater(self, delay, func):
+		self.calls.append((delay, func))
+
+	def runCalls(self):
+		calls = self.calls
+		self.calls = []
+		for delay, func in calls:
+			self.now += delay
+			func()
+
+	def addAll(self, lines):
+		for line in lines:
+			self.coalescer.add(line)
+
+	def test_linesWithinDelayAreSpokenTogether(self):
+		for line in (u"one", u"two", u"three"):
+			self.coalescer.add(line)
+			self.now += 0.1
+		# Only the first line schedules a poll.
+		self.assertEqual([delay for delay, func in self.calls], [0.5])
+		self.calls[0][1]()
+		self.assertEqual(self.spoken, [])
+		# The poll came early, so another is scheduled for when the oldest line has waited long enough.
+		self.assertEqual(len(self.calls), 2)
+		self.assertAlmostEqual(self.calls[1][0], 0.2)
+		self.calls = self.calls[1:]
+		self.runCalls()
+		self.assertEqual(self.spoken, [u"one\ntwo\nthree"])
+		self.assertEqual(self.calls, [])
+
+	def test_lineAfterDelayStartsANewUtterance(self):
+		self.coalescer.add(u"one")
+		self.runCalls()
+		self.coalescer.add(u"two")
+		self.runCalls()
+		self.assertEqual(self.spoken, [u"one", u"two"])
+
+	def test_backlogIsSpokenWhole(self):
+		lines = [u"line %d" % i for i in range(5)]
+		self.addAll(lines)
+		self.runCalls()
+		self.assertEqual(self.spoken, [u"\n".join(lines)])
+
+	def test_catchUpSpeaksSkipCountAndNewestLines(self):
+		lines = [u"line %d" % i for i in range(8)]
+		self.addAll(lines)
+		self.runCalls()
+		self.assertEqual(self.spoken, [u"6 lines skipped.\nline 6\nline 7"])
+
+	def test_clearDiscardsPendingLines(self):
+		self.addAll([u"one", u"two"])
+		self.coalescer.clear()
+		self.runCalls()
+		self.assertEqual(self.spoken, [])
+		# A later line waits the whole delay again.
+		self.now += 10.0
+		self.coalescer.add(u"three")
+		self.coalescer.poll()
+		self.assertEqual(self.spoken, [])
+		self.now += 0.5
+		self.coalescer.poll()
+		self.assertEqual(self.spoken, [u"three"])
+
+	def test_pollingWithoutCallLater(self):
+		coalescer = SpeechCoalescer(self.spoken.append, 0.5, 5, 2, clock=lambda: self.now)
+		coalescer.add(u"one")
+		self.assertFalse(coalescer.poll())
+		self.now += 0.5
+		self.assertTrue(coalescer.poll())
+		self.assertFalse(coalescer.poll())
+		self.assertEqual(self.spoken, [u"one"])
+
+
+if __name__ == "__main__":
+	unittest.main()
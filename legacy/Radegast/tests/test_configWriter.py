@@ -0,0 +1,184 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_configWriter.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import nvdaStubs
+import configWriter
+from configWriter import ConfigWriter
+
+
+class FakeConfig(object):
+	"""Stands in for a ConfigObj, writing one line for each of its values."""
+
+	def __init__(self, filename):
+		self.filename = filename
+		self.values = {}
+
+	def write(self, output):
+		for key in sorted(self.values):
+			output.write("%s = %s\r\n" % (key, self.values[key]))
+
+
+class FakeTimer(object):
+	"""Stands in for threading.Timer, only calling its function when fired by hand."""
+
+	instances = []
+
+	def __init__(self, interval, function):
+		self.function = function
+		self.cancelled = False
+		FakeTimer.instances.append(self)
+
+	def start(self):
+		pass
+
+	def cancel(self):
+		self.cancelled = True
+
+
+class TestConfigWriter(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.path = os.path.join(self.directory, "radegast_config.ini")
+		with open(self.path, "wb") as f:
+			f.write("useTimeStamps = True\r\n")
+		self.config = FakeConfig(self.path)
+		self.replacements = []
+		self.originalReplaceFile = configWriter.replaceFile
+		configWriter.replaceFile = self.replaceFile
+		FakeTimer.instances = []
+
+	def tearDown(self):
+		configWriter.replaceFile = self.originalReplaceFile
+		shutil.rmtree(self.directory)
+
+	def replaceFile(self, source, destination):
+		with open(source, "rb") as f:
+			self.replacements.append(f.read())
+		os.rename(source, destination)
+
+	def read(self):
+		with open(self.path, "rb") as f:
+			return f.read()
+
+	def toggle(self, writer, times):
+		for i in range(times):
+			self.config.values["useTimeStamps"] = i % 2 == 0
+			writer.markDirty()
+
+	def test_rapidTogglesWriteOnce(self):
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		self.toggle(writer, 10)
+		self.assertEqual(writer.writeCount, 0)
+		for timer in FakeTimer.instances:
+			if not timer.cancelled:
+				timer.function()
+		self.assertEqual(writer.writeCount, 1)
+		self.assertEqual(self.read(), "useTimeStamps = False\r\n")
+
+	def test_rapidTogglesWriteOnceWithRealTimers(self):
+		writer = ConfigWriter(self.config, 0.05)
+		self.toggle(writer, 10)
+		time.sleep(0.3)
+		self.assertEqual(writer.writeCount, 1)
+
+	def test_fileIsReplacedWhole(self):
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		self.config.values.update(("key%d" % i, "x" * 100) for i in range(100))
+		writer.markDirty()
+		writer.flush()
+		expected = self.read()
+		# The temporary file was complete before it replaced the configuration.
+		self.assertEqual(self.replacements, [expected])
+		self.assertEqual(expected.count("\r\n"), 100)
+
+	def test_failedWriteLeavesFileIntact(self):
+		def failingReplaceFile(source, destination):
+			raise EnvironmentError("Access denied")
+		configWriter.replaceFile = failingReplaceFile
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		self.toggle(writer, 1)
+		writer.flush()
+		self.assertEqual(writer.writeCount, 0)
+		self.assertEqual(self.read(), "useTimeStamps = True\r\n")
+
+	def test_failedWriteIsRetriedByNextFlush(self):
+		def failingReplaceFile(source, destination):
+			raise EnvironmentError("Access denied")
+		configWriter.replaceFile = failingReplaceFile
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		self.toggle(writer, 1)
+		writer.flush()
+		self.assertFalse(os.path.exists(self.path + ".tmp"))
+		configWriter.replaceFile = self.replaceFile
+		writer.flush()
+		self.assertEqual(writer.writeCount, 1)
+		self.assertEqual(self.read(), "useTimeStamps = True\r\n")
+
+	def test_changesDuringFailedWriteAreKept(self):
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+
+		def failingReplaceFile(source, destination):
+			# The configuration changes while the older one is being written.
+			self.config.values["useTimeStamps"] = "newer"
+			marker = threading.Thread(target=writer.markDirty)
+			marker.start()
+			marker.join(1.0)
+			self.assertFalse(marker.is_alive())
+			raise EnvironmentError("Access denied")
+
+		configWriter.replaceFile = failingReplaceFile
+		self.toggle(writer, 1)
+		writer.flush()
+		configWriter.replaceFile = self.replaceFile
+		writer.flush()
+		self.assertEqual(self.read(), "useTimeStamps = newer\r\n")
+
+	def test_markDirtyDoesNotWaitForWrite(self):
+		isWriting = threading.Event()
+		mayFinish = threading.Event()
+
+		def slowReplaceFile(source, destination):
+			isWriting.set()
+			mayFinish.wait(5.0)
+			self.replaceFile(source, destination)
+
+		configWriter.replaceFile = slowReplaceFile
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		self.toggle(writer, 1)
+		thread = threading.Thread(target=writer.flush)
+		thread.start()
+		try:
+			self.assertTrue(isWriting.wait(5.0))
+			self.config.values["useTimeStamps"] = "newer"
+			marker = threading.Thread(target=writer.markDirty)
+			marker.start()
+			marker.join(1.0)
+			self.assertFalse(marker.is_alive())
+		finally:
+			mayFinish.set()
+			thread.join()
+		self.assertEqual(self.read(), "useTimeStamps = True\r\n")
+		writer.flush()
+		self.assertEqual(writer.writeCount, 2)
+		self.assertEqual(self.read(), "useTimeStamps = newer\r\n")
+
+	def test_flushWithoutChangesDoesNotWrite(self):
+		writer = ConfigWriter(self.config, 2.0, timer=FakeTimer)
+		writer.flush()
+		self.assertEqual(writer.writeCount, 0)
+		self.assertEqual(self.replacements, [])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,96 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_history.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+from timeit import default_timer
+import unittest
+
+import nvdaStubs
+import history
+from history import formatEntry, HistoryParser, makeEntry
+from sources import TextHistorySource
+
+
+def getLines(entries):
+	return [line for line, stampLength in entries]
+
+
+class TestHistoryParser(unittest.TestCase):
+	def setUp(self):
+		self.parser = HistoryParser(100)
+		self.source = TextHistorySource()
+
+	def update(self, text):
+		self.source.text = text
+		return getLines(self.parser.update(self.source))
+
+	def test_appendedLines(self):
+		self.assertEqual(self.update(u"one\r\ntwo\r\n"), [u"one", u"two"])
+		self.assertEqual(self.update(u"one\r\ntwo\r\nthree\r\n"), [u"three"])
+
+	def test_trimmedTopReportsOnlyNewLines(self):
+		self.update(u"one\r\ntwo\r\nthree\r\n")
+		self.assertEqual(self.update(u"three\r\nfour\r\n"), [u"four"])
+
+	def test_repeatedLineInAppendedTextIsNotSkipped(self):
+		separator = u"====\r\n"
+		self.update(u"old\r\n" + separator + u"a\r\n" + separator)
+		# The top is trimmed, and the appended text repeats the last consumed line.
+		text = separator + u"a\r\n" + separator + u"b\r\n" + separator + u"c\r\n"
+		self.assertEqual(self.update(text), [u"b", u"====", u"c"])
+
+	def test_nothingSurvivedReportsNothing(self):
+		self.update(u"one\r\ntwo\r\n")
+		self.assertEqual(self.update(u"x\r\n"), [])
+		self.assertEqual(self.update(u"x\r\ny\r\n"), [u"y"])
+
+
+class FailingRegex(object):
+	"""Stands in for a compiled pattern, failing the test if it is used."""
+
+	def __getattr__(self, name):
+		raise AssertionError("The time stamp pattern was used after ingestion.")
+
+
+class TestFormatEntry(unittest.TestCase):
+	def setUp(self):
+		self.originalRegex = history.TIMESTAMPREGEX
+
+	def tearDown(self):
+		history.TIMESTAMPREGEX = self.originalRegex
+
+	def test_stampLengthIsRecordedOnIngestion(self):
+		self.assertEqual(makeEntry(u"[12:34] Bob: hi"), (u"[12:34] Bob: hi", 8))
+		self.assertEqual(makeEntry(u"2014-01-02 [12:34:56] Bob: hi"), (u"2014-01-02 [12:34:56] Bob: hi", 22))
+		self.assertEqual(makeEntry(u"Bob: [12:34] hi"), (u"Bob: [12:34] hi", 0))
+
+	def test_formattingOnlySlices(self):
+		entry = makeEntry(u"[12:34] Bob: hi")
+		history.TIMESTAMPREGEX = FailingRegex()
+		self.assertEqual(formatEntry(entry, True), u"[12:34] Bob: hi")
+		self.assertEqual(formatEntry(entry, False), u"Bob: hi")
+		self.assertEqual(formatEntry((u"Bob: hi", 0), False), u"Bob: hi")
+
+	def test_formattingIsFasterThanSubstitution(self):
+		lines = [u"[%02d:%02d] Someone Resident: line number %d" % (i // 60 % 24, i % 60, i) for i in xrange(100000)]
+		entries = [makeEntry(line) for line in lines]
+		history.TIMESTAMPREGEX = FailingRegex()
+		timings = {}
+		for useTimeStamps in (True, False):
+			start = default_timer()
+			formatted = [formatEntry(entry, useTimeStamps) for entry in entries]
+			timings[useTimeStamps] = default_timer() - start
+		start = default_timer()
+		# What getLines used to do for every line while time stamps were off.
+		substituted = [self.originalRegex.sub("", line) for line in lines]
+		timings["regex"] = default_timer() - start
+		self.assertEqual(formatted, substituted)
+		for useTimeStamps in (True, False):
+			self.assertLess(timings[useTimeStamps] * 2, timings["regex"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,110 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_historyBenchmark.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+"""Replays a long history through a fake history window, comparing the incremental parser with splitting the whole window on every change
+"""
+
+import random
+from timeit import default_timer
+import unittest
+
+import nvdaStubs
+from history import HistoryParser
+from sources import TextHistorySource
+
+# The number of lines replayed, and the most lines received in one change of the window.
+LINECOUNT = 100000
+MAXLINESPERCHANGE = 10
+
+# The window keeps at most WINDOWLINES lines, removing TRIMLINES lines from the top once it is full, as a rich edit history does.
+WINDOWLINES = 2000
+TRIMLINES = 200
+
+# Splitting the whole window is only timed for one change in this many, as timing every change would make the test take minutes.
+SPLITSAMPLEINTERVAL = 10
+
+
+def makeHistory(count):
+	generator = random.Random(1)
+	names = [u"Alice Resident", u"Bob Linden", u"Carol Ferraris"]
+	return [
+		u"[%02d:%02d] %s: %s\r\n" % (i // 60 % 24, i % 60, generator.choice(names), u"word " * generator.randint(1, 20))
+		for i in xrange(count)
+	]
+
+
+class FakeWindow(TextHistorySource):
+	"""A history source which knows its line count without splitting its text, as a rich edit control does."""
+
+	def __init__(self):
+		super(FakeWindow, self).__init__()
+		self.lineCount = 0
+		# The number of changes so far, and the number of lines received in the last one.
+		self.changeCount = 0
+		self.received = 0
+
+	def getLineCount(self):
+		return self.lineCount
+
+
+def replay(history, onChange):
+	"""Append history to a fake window a few lines at a time, calling onChange with the window after each change."""
+	generator = random.Random(2)
+	source = FakeWindow()
+	window = []
+	position = 0
+	while position < len(history):
+		chunk = history[position:position + generator.randint(1, MAXLINESPERCHANGE)]
+		window.extend(chunk)
+		position += len(chunk)
+		if len(window) > WINDOWLINES:
+			del window[:TRIMLINES]
+		source.text = u"".join(window)
+		source.lineCount = len(window) + 1
+		source.changeCount += 1
+		source.received = len(chunk)
+		onChange(source)
+	return source
+
+
+class TestHistoryBenchmark(unittest.TestCase):
+	def setUp(self):
+		self.history = makeHistory(LINECOUNT)
+
+	def test_incrementalParsingBeatsFullSplit(self):
+		parser = HistoryParser(WINDOWLINES)
+		reported = []
+		# The characters the old code copied, and the seconds taken by the parser and by the sampled splits.
+		totals = {"fullCopied": 0, "incremental": 0.0, "split": 0.0, "splitCount": 0}
+
+		def onChange(source):
+			start = default_timer()
+			entries = parser.update(source)
+			totals["incremental"] += default_timer() - start
+			reported.extend(line for line, stampLength in entries)
+			totals["fullCopied"] += source.getLength()
+			if source.changeCount % SPLITSAMPLEINTERVAL:
+				return
+			# What getLines and event_valueChange used to do for every change of the window, with time stamps on.
+			start = default_timer()
+			lines = [line for line in source.text.splitlines() if line.strip()]
+			newLines = lines[-source.received:]
+			totals["split"] += default_timer() - start
+			totals["splitCount"] += 1
+			self.assertEqual(newLines, [line for line, stampLength in entries])
+
+		source = replay(self.history, onChange)
+		self.assertEqual(reported, [line[:-2] for line in self.history])
+		# Only the appended text, and the window once for each trim of its top, were copied, rather than the window on every change.
+		self.assertLess(source.charsCopied * 2, totals["fullCopied"])
+		incrementalTime = totals["incremental"] / source.changeCount
+		splitTime = totals["split"] / totals["splitCount"]
+		self.assertLess(incrementalTime * 2, splitTime)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_historyStates.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import unittest
+
+import nvdaStubs
+from history import HistoryState, HistoryStates
+
+
+class TestHistoryStates(unittest.TestCase):
+	def setUp(self):
+		self.openWindows = set()
+		self.states = HistoryStates(100, self.openWindows.__contains__)
+
+	def openTab(self, windowHandle):
+		self.openWindows.add(windowHandle)
+		self.states.add(windowHandle, HistoryState(10))
+
+	def test_boundedAfterThousandsOfOpenTabs(self):
+		for windowHandle in range(5000):
+			self.openTab(windowHandle)
+			self.assertLessEqual(len(self.states), 100)
+		# The least recently used states were evicted.
+		self.assertIsNone(self.states.get(0))
+		self.assertIsNotNone(self.states.get(4999))
+
+	def test_closedTabsAreEvicted(self):
+		for windowHandle in range(5000):
+			self.openTab(windowHandle)
+			if windowHandle > 0:
+				self.openWindows.discard(windowHandle - 1)
+			self.assertLessEqual(len(self.states), 2)
+		self.states.prune()
+		self.assertEqual(len(self.states), 1)
+
+	def test_recentlyUsedStateIsKept(self):
+		for windowHandle in range(100):
+			self.openTab(windowHandle)
+		state = self.states.get(0)
+		self.openTab(100)
+		self.assertIs(self.states.get(0), state)
+		self.assertIsNone(self.states.get(1))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,110 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_search.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import unittest
+
+import nvdaStubs
+from history import HistoryParser
+from search import getWords, SearchIndex
+from sources import TextHistorySource
+
+
+class TestSearchIndex(unittest.TestCase):
+	def setUp(self):
+		self.index = SearchIndex()
+		self.lines = [u"Bob: hello there", u"Alice: hi Bob", u"Bob: how are you", u"Alice: fine thanks"]
+		for i, line in enumerate(self.lines):
+			self.index.add(i, line)
+
+	def find(self, query, fromIndex, forward=True):
+		return self.index.find(query, fromIndex, 0, len(self.lines), forward)
+
+	def test_wordsIgnoreCaseAndPunctuation(self):
+		self.assertEqual(getWords(u"Bob: Hello, BOB!"), set([u"bob", u"hello"]))
+
+	def test_findForward(self):
+		self.assertEqual(self.find(u"bob", -1), 0)
+		self.assertEqual(self.find(u"bob", 0), 1)
+		self.assertEqual(self.find(u"Bob how", 0), 2)
+		self.assertEqual(self.find(u"alice", 1), 3)
+
+	def test_findForwardStopsAtEnd(self):
+		self.assertEqual(self.find(u"alice", 3), None)
+		self.assertEqual(self.find(u"bob", 2), None)
+		# Lines at or beyond the end of the range are never found.
+		self.assertEqual(self.index.find(u"alice", 1, 0, 3), None)
+
+	def test_findBackward(self):
+		self.assertEqual(self.find(u"bob", 4, False), 2)
+		self.assertEqual(self.find(u"bob", 2, False), 1)
+		self.assertEqual(self.find(u"alice fine", 4, False), 3)
+
+	def test_findBackwardStopsAtStart(self):
+		self.assertEqual(self.find(u"bob", 0, False), None)
+		self.assertEqual(self.find(u"alice", 1, False), None)
+		# Lines before the start of the range are never found.
+		self.assertEqual(self.index.find(u"bob", 3, 1, 4, False), 2)
+		self.assertEqual(self.index.find(u"hello", 3, 1, 4, False), None)
+
+	def test_findBackwardFromBeyondTheEnd(self):
+		self.assertEqual(self.index.find(u"bob", 100, 0, 2, False), 1)
+
+	def test_findForwardFromBeforeTheStart(self):
+		self.assertEqual(self.index.find(u"bob", -100, 1, 4), 1)
+
+	def test_missingWordsFindNothing(self):
+		self.assertEqual(self.find(u"bob carol", -1), None)
+		self.assertEqual(self.find(u"!!!", -1), None)
+
+
+class TestParserIndex(unittest.TestCase):
+	def setUp(self):
+		self.parser = HistoryParser(4)
+		self.source = TextHistorySource()
+
+	def append(self, text):
+		self.source.text += text
+		self.parser.update(self.source)
+
+	def find(self, query, fromIndex=-1, forward=True):
+		lines = self.parser.lines
+		return self.parser.index.find(query, fromIndex, lines.start, lines.end, forward)
+
+	def test_discardedLinesAreCompacted(self):
+		for i in range(20):
+			self.append(u"[12:00] apple %d\r\n" % i)
+			postings = self.parser.index._postings[u"apple"]
+			# Stale entries are kept until they make up half the list.
+			self.assertLessEqual(len(postings), 2 * len(self.parser.lines))
+			self.assertEqual(postings[-4:], range(max(0, i - 3), i + 1))
+		self.assertEqual(self.find(u"apple"), 16)
+		self.assertEqual(self.find(u"apple", 100, False), 19)
+		self.assertEqual(self.find(u"apple", 16, False), None)
+
+	def test_wordsOfDiscardedLinesAreForgotten(self):
+		self.append(u"[12:00] banana\r\n")
+		for i in range(4):
+			self.append(u"[12:00] apple %d\r\n" % i)
+		self.assertNotIn(u"banana", self.parser.index._postings)
+		self.assertEqual(self.find(u"banana"), None)
+
+	def test_timeStampsAreNotIndexed(self):
+		self.append(u"[12:00] apple\r\n")
+		self.assertEqual(self.find(u"12"), None)
+
+	def test_unterminatedLineIsIndexedOnce(self):
+		self.append(u"[12:00] hello wor")
+		self.assertEqual(self.find(u"wor"), 0)
+		self.append(u"ld\r\n")
+		self.assertEqual(self.find(u"wor"), None)
+		self.assertNotIn(u"wor", self.parser.index._postings)
+		self.assertEqual(self.find(u"world"), 0)
+		self.assertEqual(self.parser.index._postings[u"hello"], [0])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,40 @@
+﻿# -*- coding: UTF-8 -*-
+#tests/test_sources.py
+#A part of NonVisual Desktop Access (NVDA)
+#This file is covered by the GNU General Public License.
+#See the file COPYING for more details.
+#Copyright (C) 2014 Nick Stockton <nstockton@gmail.com>
+
+import unittest
+
+import nvdaStubs
+from history import HistoryParser
+from sources import TextHistorySource
+
+
+class TestCopyVolume(unittest.TestCase):
+	def test_onlyNewTextIsCopied(self):
+		text = u"".join(u"[12:%02d] Someone: line %d\r\n" % (i % 60, i) for i in range(1000))
+		source = TextHistorySource(text)
+		parser = HistoryParser(5000)
+		parser.update(source)
+		for i in range(100):
+			line = u"[13:00] Someone: new line %d\r\n" % i
+			copied = source.charsCopied
+			# The last consumed line is read again, to check the history wasn't rewritten.
+			checked = len(parser.lastRaw)
+			source.text += line
+			self.assertEqual(len(parser.update(source)), 1)
+			self.assertEqual(source.charsCopied - copied, checked + len(line))
+
+	def test_unchangedHistoryCopiesLittle(self):
+		source = TextHistorySource(u"one\r\ntwo\r\n")
+		parser = HistoryParser(100)
+		parser.update(source)
+		copied = source.charsCopied
+		self.assertEqual(parser.update(source), [])
+		self.assertEqual(source.charsCopied - copied, len(u"two\r\n"))
+
+
+if __name__ == "__main__":
+	unittest.main()